@@ -395,6 +395,11 @@ rare_max_related_gene_increase_factor: float = 4.0
 #: :py:func:`metacells.pipeline.divide_and_conquer.divide_and_conquer_pipeline`.
 rare_min_cell_module_total: int = int((significant_value + 1) / 2)
 
+#: The minimal number of cells (as a multiple of the target pile size) for looking for rare gene modules. Zero means
+#: always look for them. See
+#: :py:func:`metacells.pipeline.divide_and_conquer.divide_and_conquer_pipeline`.
+rare_min_piles_to_detect: float = 0.0
+
 #: The maximal fraction of cells to mark as "deviants" in rare gene module piles. See
 #: :py:func:`metacells.tools.deviants.find_deviant_cells`,
 #: :py:func:`metacells.pipeline.direct.compute_direct_metacells`,
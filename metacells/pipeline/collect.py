@@ -127,6 +127,7 @@ def collect_metacells(  # pylint: disable=too-many-statements
 
     umis_per_gene_per_cell = ut.get_vo_proper(adata, what, layout="row_major")
     umis_per_cell = ut.get_o_numpy(adata, what, sum=True).astype("float64")
+    cell_indices_of_metacells = ut.group_indices(metacell_of_cells, groups_count=metacells_count)
 
     @ut.timed_call()
     def _collect_metacell(metacell_index: int) -> Dict[str, Any]:
@@ -138,16 +139,16 @@ def collect_metacells(  # pylint: disable=too-many-statements
             if random_seed != 0:
                 np.random.seed(random_seed + metacell_index)
 
-            mask_per_cell = metacell_of_cells == metacell_index
-            grouped_of_metacell = np.sum(mask_per_cell)
+            cell_indices = cell_indices_of_metacells[metacell_index]
+            grouped_of_metacell = len(cell_indices)
             ut.log_calc("grouped_of_metacell", grouped_of_metacell)
             assert grouped_of_metacell > 0
 
-            umis_per_cell_of_metacell = umis_per_cell[mask_per_cell]
+            umis_per_cell_of_metacell = umis_per_cell[cell_indices]
             total_umis_of_metacell = np.sum(umis_per_cell_of_metacell)
             ut.log_calc("total_umis_of_metacell", total_umis_of_metacell)
 
-            umis_per_gene_per_cell_of_metacell = ut.to_numpy_matrix(umis_per_gene_per_cell[mask_per_cell, :])
+            umis_per_gene_per_cell_of_metacell = ut.to_numpy_matrix(umis_per_gene_per_cell[cell_indices, :])
 
             zeros_downsample_umis = round(np.quantile(umis_per_cell_of_metacell, zeros_cell_size_quantile))
             ut.log_calc("zeros_downsample_umis", zeros_downsample_umis)
@@ -229,9 +230,9 @@ def collect_metacells(  # pylint: disable=too-many-statements
         name = ut.get_name(adata, "unnamed") + name  # type: ignore
     ut.set_name(mdata, name)
     mdata.var_names = adata.var_names
-    mdata.obs_names = _obs_names(prefix or "", ut.to_numpy_vector(adata.obs_names), metacell_of_cells)
+    mdata.obs_names = _obs_names(prefix or "", ut.to_numpy_vector(adata.obs_names), cell_indices_of_metacells)
 
-    grouped_per_metacell = np.array([result["grouped"] for result in results])
+    grouped_per_metacell = np.array([result["grouped"] for result in results], dtype="int32")
     ut.set_o_data(mdata, "grouped", grouped_per_metacell)
 
     total_umis_per_metacell = np.array([result["total_umis"] for result in results])
@@ -242,7 +243,9 @@ def collect_metacells(  # pylint: disable=too-many-statements
     assert umis_per_gene_per_metacell.shape == (metacells_count, adata.n_vars)
     ut.set_vo_data(mdata, "total_umis", umis_per_gene_per_metacell)
 
-    zeros_downsample_umis_per_metacell = np.array([result["zeros_downsample_umis"] for result in results])
+    zeros_downsample_umis_per_metacell = np.array(
+        [result["zeros_downsample_umis"] for result in results], dtype="int32"
+    )
     ut.set_o_data(mdata, "__zeros_downsample_umis", zeros_downsample_umis_per_metacell)
 
     zeros_per_gene_per_metacell = np.vstack([result["zeros_per_gene"] for result in results])
@@ -284,15 +287,15 @@ def collect_metacells(  # pylint: disable=too-many-statements
 
 
 # TODO: Replicated in metacells.tools.group
-def _obs_names(prefix: str, name_of_members: ut.NumpyVector, group_of_members: ut.NumpyVector) -> List[str]:
-    groups_count = np.max(group_of_members) + 1
+def _obs_names(
+    prefix: str, name_of_members: ut.NumpyVector, member_indices_of_groups: List[ut.NumpyVector]
+) -> List[str]:
     name_of_groups: List[str] = []
     prefix = prefix or ""
-    for group_index in range(groups_count):
-        groups_mask = group_of_members == group_index
-        assert np.any(groups_mask)
+    for group_index, member_indices in enumerate(member_indices_of_groups):
+        assert len(member_indices) > 0
         hasher = shake_128()
-        for member_name in name_of_members[groups_mask]:
+        for member_name in name_of_members[member_indices]:
             hasher.update(member_name.encode("utf8"))
         checksum = int(hasher.hexdigest(16), 16) % 100
         name_of_groups.append(f"{prefix}{group_index}.{checksum:02d}")
@@ -8,7 +8,9 @@ import logging
 import os
 from dataclasses import dataclass
 from dataclasses import replace
+from hashlib import blake2b
 from math import ceil
+from typing import Any
 from typing import Dict
 from typing import List
 from typing import Optional
@@ -17,6 +19,7 @@ from typing import Union
 
 import numpy as np
 import psutil  # type: ignore
+import scipy.sparse as sp  # type: ignore
 from anndata import AnnData  # type: ignore
 
 import metacells.parameters as pr
@@ -30,6 +33,7 @@ from .direct import compute_direct_metacells
 __all__ = [
     "set_max_parallel_piles",
     "get_max_parallel_piles",
+    "clear_rare_gene_modules_cache",
     "guess_max_parallel_piles",
     "compute_target_pile_size",
     "divide_and_conquer_pipeline",
@@ -39,6 +43,11 @@ __all__ = [
 
 MAX_PARALLEL_PILES = 0
 
+#: The key and results (rare gene module of each cell and of each gene) of the last rare gene modules detection. This
+#: only holds the results of a single detection, which are kept (in the current process) until the next detection with
+#: a different key, or until :py:func:`clear_rare_gene_modules_cache` is called.
+RARE_GENE_MODULES_CACHE: Optional[Tuple[str, ut.NumpyVector, ut.NumpyVector]] = None
+
 
 def set_max_parallel_piles(max_parallel_piles: int) -> None:
     """
@@ -69,6 +78,18 @@ def get_max_parallel_piles() -> int:
     return MAX_PARALLEL_PILES
 
 
+def clear_rare_gene_modules_cache() -> None:
+    """
+    Forget the cached results of the last rare gene modules detection.
+
+    This releases the memory of the cached results, and forces the next invocation of
+    :py:func:`divide_and_conquer_pipeline` to detect the rare gene modules even if it was given
+    ``cache_rare_gene_modules``.
+    """
+    global RARE_GENE_MODULES_CACHE
+    RARE_GENE_MODULES_CACHE = None
+
+
 @ut.expand_doc(percent=round((1 + pr.max_gbs) * 100))
 def guess_max_parallel_piles(
     cells: AnnData,
@@ -191,7 +212,7 @@ def compute_target_pile_size(
     return target_pile_size
 
 
-@dataclass
+@dataclass(frozen=True)
 class DirectParameters:  # pylint: disable=too-many-instance-attributes
     """
     Parameters for direct computation of metacells in a single pile.
@@ -242,7 +263,7 @@ class DirectParameters:  # pylint: disable=too-many-instance-attributes
     random_seed: int
 
 
-@dataclass
+@dataclass(frozen=True)
 class DacParameters:  # pylint: disable=too-many-instance-attributes
     """
     Parameters controlling divide-and-conquer algorithm.
@@ -269,10 +290,10 @@ class SubsetResults:
 
     def __init__(self, sdata: AnnData) -> None:
         #: The computed metacell index for each cell.
-        self.metacell_indices = ut.get_o_numpy(sdata, "metacell", formatter=ut.groups_description).copy()
+        self.metacell_indices = ut.get_o_numpy(sdata, "metacell", formatter=ut.groups_description)
 
         #: The mask of the cells which were in dissolved metacells.
-        self.dissolved = ut.get_o_numpy(sdata, "dissolved", formatter=ut.groups_description).copy()
+        self.dissolved = ut.get_o_numpy(sdata, "dissolved", formatter=ut.groups_description)
 
         #: The full index of each cell.
         self.full_cell_indices = ut.get_o_numpy(sdata, "__full_cell_index__")
@@ -281,46 +302,23 @@ class SubsetResults:
         self.selected_mask = ut.get_v_numpy(sdata, "selected_gene")
 
     @ut.logged()
-    def collect(
-        self,
-        *,
-        adata: AnnData,
-        counts: List[int],
-        metacells_level: int,
-        collected_mask: ut.NumpyVector,
-    ) -> None:
+    def collect(self, *, counts: List[int], selected_genes_mask: ut.NumpyVector) -> ut.NumpyVector:
         """
-        Collect the results of the subset into the full data.
-        """
-        metacell_of_cells = ut.get_o_numpy(adata, "metacell", formatter=ut.groups_description).copy()
-        dissolved_of_cells = ut.get_o_numpy(adata, "dissolved", formatter=ut.groups_description).copy()
-        level_of_cells = ut.get_o_numpy(adata, "metacell_level").copy()
-
-        if np.any(collected_mask):
-            max_collected = np.max(metacell_of_cells[collected_mask])
-        else:
-            max_collected = -1
-        assert max_collected + 1 == counts[0]
+        Collect the results of the subset, allocating the next metacell indices (starting at ``counts[0]``) to its
+        metacells, and merging its selected genes into the (writable) ``selected_genes_mask``.
 
+        Returns the metacell index of each of the subset's cells in the full data. The caller is responsible for
+        scattering these (and the ``dissolved`` mask) into the full data using the ``full_cell_indices``.
+        """
         metacell_of_subset = self.metacell_indices
-        dissolved_of_subset = self.dissolved
         ut.log_calc("subset[metacell]", metacell_of_subset, formatter=ut.groups_description)
-        ut.log_calc("subset[dissolved]", dissolved_of_subset)
+        ut.log_calc("subset[dissolved]", self.dissolved)
         metacells_count = round(np.max(metacell_of_subset) + 1)
-        metacell_of_subset[metacell_of_subset >= 0] += counts[0]
+        metacell_of_subset = np.where(metacell_of_subset >= 0, metacell_of_subset + counts[0], metacell_of_subset)
         counts[0] += metacells_count
-        metacell_of_cells[self.full_cell_indices] = metacell_of_subset
-        dissolved_of_cells[self.full_cell_indices] = dissolved_of_subset
-        level_of_cells[self.full_cell_indices] = metacells_level
-        ut.set_o_data(adata, "metacell", metacell_of_cells, formatter=ut.groups_description)
-        ut.set_o_data(adata, "dissolved", dissolved_of_cells)
-        ut.set_o_data(adata, "metacell_level", level_of_cells)
 
-        assert not np.any(collected_mask[self.full_cell_indices])
-        collected_mask[self.full_cell_indices] = True
-
-        selected_genes_mask = ut.get_v_numpy(adata, "selected_gene")
-        ut.set_v_data(adata, "selected_gene", selected_genes_mask | self.selected_mask)
+        selected_genes_mask |= self.selected_mask
+        return metacell_of_subset
 
 
 def compute_derived_parameters(
@@ -376,11 +374,13 @@ def divide_and_conquer_pipeline(
     rare_min_related_gene_fold_factor: float = pr.rare_min_related_gene_fold_factor,
     rare_max_related_gene_increase_factor: float = pr.rare_max_related_gene_increase_factor,
     rare_min_cell_module_total: int = pr.rare_min_cell_module_total,
+    rare_min_piles_to_detect: float = pr.rare_min_piles_to_detect,
     rare_max_cells_factor_of_random_pile: float = pr.rare_max_cells_factor_of_random_pile,
     rare_deviants_max_cell_fraction: Optional[float] = pr.rare_deviants_max_cell_fraction,
     rare_dissolve_min_robust_size_factor: Optional[float] = pr.rare_dissolve_min_robust_size_factor,
     rare_dissolve_min_convincing_size_factor: Optional[float] = pr.rare_dissolve_min_convincing_size_factor,
     rare_dissolve_min_convincing_gene_fold_factor: float = pr.dissolve_min_convincing_gene_fold_factor,
+    cache_rare_gene_modules: bool = False,
     quick_and_dirty: bool = pr.quick_and_dirty,
     select_downsample_min_samples: int = pr.select_downsample_min_samples,
     select_downsample_min_cell_quantile: float = pr.select_downsample_min_cell_quantile,
@@ -499,7 +499,13 @@ def divide_and_conquer_pipeline(
        ``rare_max_cells_factor_of_random_pile`` (default: {rare_max_cells_factor_of_random_pile})
        and
        ``rare_min_cell_module_total`` (default: {rare_min_cell_module_total}). Use a non-zero
-       ``random_seed`` to make this reproducible.
+       ``random_seed`` to make this reproducible. Skip this (that is, assume there are no rare gene modules) if the
+       number of cells is less than ``rare_min_piles_to_detect`` (default: {rare_min_piles_to_detect}) times the target
+       pile size. If ``cache_rare_gene_modules`` (default: {cache_rare_gene_modules}) is set, and the previous
+       invocation (in the same process) was given exactly the same data and rare gene modules parameters, reuse its
+       results instead of detecting the rare gene modules again. This is useful when repeatedly re-running the pipeline
+       while only tweaking the later parameters. Only the results of the last detection are kept; call
+       :py:func:`clear_rare_gene_modules_cache` to release them.
 
     2. For each detected rare gene module, collect all cells that express the module, and apply
        :py:func:`metacells.pipeline.direct.compute_direct_metacells` to them.
@@ -590,9 +596,11 @@ def divide_and_conquer_pipeline(
     name = ut.get_name(adata)
 
     with ut.timed_step(".rare"):
-        tl.find_rare_gene_modules(
+        _find_rare_gene_modules(
             adata,
             what,
+            min_piles_to_detect=rare_min_piles_to_detect,
+            cache=cache_rare_gene_modules,
             max_genes=rare_max_genes,
             max_gene_cell_fraction=rare_max_gene_cell_fraction,
             min_gene_maximum=rare_min_gene_maximum,
@@ -669,6 +677,74 @@ def divide_and_conquer_pipeline(
     assert np.all(collected_mask)
 
 
+@ut.timed_call()
+def _find_rare_gene_modules(
+    adata: AnnData, what: str, *, min_piles_to_detect: float, cache: bool, **kwargs: Any
+) -> None:
+    global RARE_GENE_MODULES_CACHE
+
+    if adata.n_obs < min_piles_to_detect * kwargs["target_pile_size"]:
+        ut.log_calc("skip rare gene modules", True)
+        _set_rare_gene_modules(
+            adata,
+            rare_module_of_cells=np.full(adata.n_obs, -1, dtype="int32"),
+            rare_module_of_genes=np.full(adata.n_vars, -1, dtype="int32"),
+        )
+        return
+
+    if not cache:
+        tl.find_rare_gene_modules(adata, what, **kwargs)
+        return
+
+    key = _rare_gene_modules_key(adata, what, kwargs)
+    if RARE_GENE_MODULES_CACHE is not None and RARE_GENE_MODULES_CACHE[0] == key:
+        ut.log_calc("cached rare gene modules", True)
+        _, rare_module_of_cells, rare_module_of_genes = RARE_GENE_MODULES_CACHE
+        _set_rare_gene_modules(
+            adata, rare_module_of_cells=rare_module_of_cells, rare_module_of_genes=rare_module_of_genes
+        )
+        return
+
+    ut.log_calc("cached rare gene modules", False)
+    RARE_GENE_MODULES_CACHE = None
+    tl.find_rare_gene_modules(adata, what, **kwargs)
+    RARE_GENE_MODULES_CACHE = (
+        key,
+        ut.get_o_numpy(adata, "cells_rare_gene_module"),
+        ut.get_v_numpy(adata, "rare_gene_module"),
+    )
+
+
+def _set_rare_gene_modules(
+    adata: AnnData, *, rare_module_of_cells: ut.NumpyVector, rare_module_of_genes: ut.NumpyVector
+) -> None:
+    ut.set_v_data(adata, "rare_gene", rare_module_of_genes >= 0)
+    ut.set_v_data(adata, "rare_gene_module", rare_module_of_genes, formatter=ut.groups_description)
+    ut.set_o_data(adata, "cells_rare_gene_module", rare_module_of_cells, formatter=ut.groups_description)
+    ut.set_o_data(adata, "rare_cell", rare_module_of_cells >= 0)
+
+
+@ut.timed_call()
+def _rare_gene_modules_key(adata: AnnData, what: str, parameters: Dict[str, Any]) -> str:
+    hasher = blake2b(digest_size=32)
+    hasher.update(repr(sorted(parameters.items())).encode("utf8"))
+    hasher.update(repr(adata.shape).encode("utf8"))
+    for names in (adata.obs_names, adata.var_names):
+        hasher.update("\0".join(names).encode("utf8"))
+        hasher.update(b"\1")
+    if ut.has_data(adata, "lateral_gene"):
+        hasher.update(ut.get_v_numpy(adata, "lateral_gene").tobytes())
+    data = ut.get_vo_proper(adata, what, layout="row_major")
+    if isinstance(data, sp.spmatrix):
+        arrays = [data.data, data.indices, data.indptr]
+    else:
+        arrays = [data]
+    for array in arrays:
+        hasher.update(str(array.dtype).encode("utf8"))
+        hasher.update(np.ascontiguousarray(array).data)
+    return hasher.hexdigest()
+
+
 @ut.logged()
 def compute_divide_and_conquer_metacells(
     adata: AnnData,
@@ -908,16 +984,18 @@ def _initialize_divide_and_conquer_results(adata: AnnData) -> None:
     )
     ut.incremental(adata, "v", "selected_gene")
 
-    for name, value, dtype in (
-        ("metacell", -1, "int32"),
-        ("dissolved", False, "bool"),
-        ("metacell_level", -1, "int32"),
+    # The initial values are frozen, so the identical ones can safely share the same vector.
+    unassigned_of_cells = np.full(adata.n_obs, -1, dtype="int32")
+    for name, value, values in (
+        ("metacell", -1, unassigned_of_cells),
+        ("dissolved", False, np.zeros(adata.n_obs, dtype="bool")),
+        ("metacell_level", -1, unassigned_of_cells),
     ):
         ut.incremental(adata, "o", name)
         ut.set_o_data(
             adata,
             name,
-            np.full(adata.n_obs, value, dtype=dtype),
+            values,
             formatter=lambda _: f"* -> {value}",  # pylint: disable=cell-var-from-loop
         )
 
@@ -925,7 +1003,10 @@ def _initialize_divide_and_conquer_results(adata: AnnData) -> None:
 @ut.logged()
 def _reset_subset_results(adata: AnnData, subset_cells_mask: ut.NumpyVector) -> None:
     for name, value, formatter in (("metacell", -1, ut.groups_description),):
-        values = ut.get_o_numpy(adata, name, formatter=formatter).copy()
+        values = ut.get_o_numpy(adata, name, formatter=formatter)
+        if np.all(values[subset_cells_mask] == value):
+            continue
+        values = values.copy()
         values[subset_cells_mask] = value
         ut.set_o_data(adata, name, values, formatter=formatter)
 
@@ -952,13 +1033,14 @@ def _compute_divide_and_conquer_subset(
     if not np.any(subset_mask):
         return
 
+    subset_count = int(np.count_nonzero(subset_mask))
+    preliminary_piles_count = ut.random_piles_count(subset_count, dac_parameters.target_pile_size)
     preliminary_pile_of_cells = np.full(adata.n_obs, -1, dtype="int32")
     preliminary_pile_of_cells[subset_mask] = ut.random_piles(
-        np.sum(subset_mask),
+        subset_count,
         target_pile_size=dac_parameters.target_pile_size,
         random_seed=dac_parameters.direct_parameters.random_seed,
     )
-    preliminary_piles_count = np.max(preliminary_pile_of_cells) + 1
 
     time_fractions = _times_to_fractions(
         _divide_and_conquer_times(
@@ -989,6 +1071,7 @@ def _compute_divide_and_conquer_subset(
                 subset_mask=subset_mask,
                 collected_mask=collected_mask,
                 pile_of_cells=preliminary_pile_of_cells,
+                piles_count=preliminary_piles_count,
                 counts=counts,
                 metacells_level=metacells_level,
                 max_metacells_level=1000,
@@ -1005,6 +1088,7 @@ def _compute_divide_and_conquer_subset(
             subset_mask=subset_mask,
             collected_mask=np.zeros(adata.n_obs, dtype="bool"),
             pile_of_cells=preliminary_pile_of_cells,
+            piles_count=preliminary_piles_count,
             counts=[0],
             metacells_level=metacells_level,
             max_metacells_level=1000,
@@ -1022,7 +1106,7 @@ def _compute_divide_and_conquer_subset(
         groups_time /= total_time
 
     with ut.progress_bar_slice(total_time):
-        final_pile_of_cells = _compute_metacell_groups(
+        final_pile_of_cells, final_piles_count = _compute_metacell_groups(
             adata,
             what,
             collect_time=collect_time,
@@ -1043,6 +1127,7 @@ def _compute_divide_and_conquer_subset(
                 subset_mask=subset_mask,
                 collected_mask=collected_mask,
                 pile_of_cells=final_pile_of_cells,
+                piles_count=final_piles_count,
                 counts=counts,
                 metacells_level=metacells_level,
                 max_metacells_level=1000 if dac_parameters.direct_parameters.must_complete_cover else 1,
@@ -1060,6 +1145,7 @@ def _compute_divide_and_conquer_subset(
                 subset_mask=subset_mask,
                 collected_mask=collected_mask,
                 pile_of_cells=final_pile_of_cells,
+                piles_count=final_piles_count,
                 counts=counts,
                 metacells_level=metacells_level,
                 max_metacells_level=metacells_level,
@@ -1098,13 +1184,13 @@ def _compute_metacells_in_levels(
     subset_mask: ut.NumpyVector,
     collected_mask: ut.NumpyVector,
     pile_of_cells: ut.NumpyVector,
+    piles_count: int,
     counts: List[int],
     metacells_level: int,
     max_metacells_level: int,
     dac_parameters: DacParameters,
 ) -> None:
     assert metacells_level <= max_metacells_level
-    piles_count = np.max(pile_of_cells[subset_mask]) + 1
     assert piles_count > 0
 
     remaining_time_fraction = 1.0 if ut.has_progress_bar() else None
@@ -1119,7 +1205,7 @@ def _compute_metacells_in_levels(
             remaining_time_fraction *= outliers_fraction
 
         with ut.progress_bar_slice(time_fraction):
-            _compute_metacells_of_piles(
+            outliers_count = _compute_metacells_of_piles(
                 adata,
                 what,
                 prefix=f"{prefix}.level.{metacells_level}",
@@ -1131,25 +1217,47 @@ def _compute_metacells_in_levels(
             )
             assert np.all(collected_mask[subset_mask])
 
-        if is_last:
+        if is_last or outliers_count == 0:
             return
 
         metacells_level += 1
         metacell_of_cells = ut.get_o_numpy(adata, "metacell")
         subset_mask = subset_mask & (metacell_of_cells < 0)
-        subset_count = int(np.sum(subset_mask))
-        if subset_count == 0:
-            return
 
         collected_mask[subset_mask] = False
         pile_of_cells = np.full(adata.n_obs, -1, dtype="int32")
         pile_of_cells[subset_mask] = ut.random_piles(
-            subset_count,
+            outliers_count,
             target_pile_size=dac_parameters.target_pile_size,
             random_seed=dac_parameters.direct_parameters.random_seed,
         )
 
 
+def _collect_metacell_groups(
+    adata: AnnData,
+    what: str,
+    *,
+    metacell_of_cells: ut.NumpyVector,
+    prefix: str,
+    subset_mask: ut.NumpyVector,
+    random_seed: int,
+) -> AnnData:
+    # The sliced cells data is only needed for collecting the metacell groups, so it is released when this returns,
+    # instead of being held during the recursion on the groups. Slicing all the cells is just a copy which shares the
+    # derived data (layouts and sums) of the full data.
+    subset_indices = np.flatnonzero(subset_mask)
+    sdata = ut.slice(adata, name=f"{prefix}.grouped", top_level=False, obs=subset_indices)
+    return collect_metacells(
+        sdata,
+        what,
+        groups=metacell_of_cells[subset_indices],
+        name=prefix,
+        _metacell_groups=True,
+        top_level=False,
+        random_seed=random_seed,
+    )
+
+
 @ut.logged()
 @ut.timed_call()
 def _compute_metacell_groups(
@@ -1162,26 +1270,17 @@ def _compute_metacell_groups(
     subset_mask: ut.NumpyVector,
     dac_parameters: DacParameters,
     random_seed: int,
-) -> ut.NumpyVector:
+) -> Tuple[ut.NumpyVector, int]:
     metacell_of_cells = ut.get_o_numpy(adata, "metacell")
     assert not np.any(metacell_of_cells[subset_mask] < 0)
 
     with ut.progress_bar_slice(collect_time):
-        sdata = ut.slice(
+        mdata = _collect_metacell_groups(
             adata,
-            name=f"{prefix}.grouped",
-            top_level=False,
-            obs=subset_mask,
-            track_obs="__full_cell_index__",
-        )
-
-        mdata = collect_metacells(
-            sdata,
             what,
-            groups=metacell_of_cells[subset_mask],
-            name=prefix,
-            _metacell_groups=True,
-            top_level=False,
+            metacell_of_cells=metacell_of_cells,
+            prefix=prefix,
+            subset_mask=subset_mask,
             random_seed=random_seed,
         )
 
@@ -1217,6 +1316,7 @@ def _compute_metacell_groups(
 
         _initialize_divide_and_conquer_results(mdata)
         collected_mask = np.zeros(mdata.n_obs, dtype="bool")
+        groups_counts = [0]
 
         _compute_divide_and_conquer_subset(
             mdata,
@@ -1225,7 +1325,7 @@ def _compute_metacell_groups(
             subset_mask=np.full(mdata.n_obs, True, dtype="bool"),
             collected_mask=collected_mask,
             metacells_level=0,
-            counts=[0],
+            counts=groups_counts,
             dac_parameters=group_dac_parameters,
             random_seed=random_seed,
         )
@@ -1243,7 +1343,7 @@ def _compute_metacell_groups(
     metacells_selected_genes_mask = ut.get_v_numpy(adata, "selected_gene")
     ut.set_v_data(adata, "selected_gene", groups_selected_genes_mask | metacells_selected_genes_mask)
 
-    return pile_of_cells
+    return pile_of_cells, groups_counts[0]
 
 
 @ut.logged()
@@ -1259,21 +1359,22 @@ def _compute_metacells_of_piles(
     direct_parameters: DirectParameters,
     metacells_level: int,
 ) -> int:
-    piles_count = np.max(pile_of_cells) + 1
+    cell_indices_of_piles = ut.group_indices(pile_of_cells)
+    piles_count = len(cell_indices_of_piles)
 
     @ut.timed_call()
     def _compute_pile_metacells(pile_index: int) -> SubsetResults:
-        pile_cells_mask = pile_of_cells == pile_index
-        assert np.any(pile_cells_mask)
+        pile_cell_indices = cell_indices_of_piles[pile_index]
+        assert len(pile_cell_indices) > 0
         pdata = ut.slice(
             adata,
             name=f"{prefix}.{pile_index}/{piles_count}" if piles_count > 1 else prefix,
             top_level=False,
-            obs=pile_cells_mask,
+            obs=pile_cell_indices,
             track_obs="__full_cell_index__",
         )
         parameters = direct_parameters.__dict__.copy()
-        parameters["cell_sizes"] = direct_parameters.cell_sizes[pile_cells_mask]
+        parameters["cell_sizes"] = direct_parameters.cell_sizes[pile_cell_indices]
         if piles_count > 1:
             parameters["must_complete_cover"] = False
         with ut.timed_step(".direct"):
@@ -1289,28 +1390,63 @@ def _compute_metacells_of_piles(
     with ut.timed_step(".compute"):
         gc.collect()
         ut.logger().debug("MAX_PARALLEL_PILES: %s", get_max_parallel_piles())
-        subset_results_of_piles = ut.parallel_map(
-            _compute_pile_metacells,
-            piles_count,
-            max_processors=get_max_parallel_piles(),
+        subset_results_of_piles: List[Optional[SubsetResults]] = list(
+            ut.parallel_map(
+                _compute_pile_metacells,
+                piles_count,
+                max_processors=get_max_parallel_piles(),
+                weights=[len(pile_cell_indices) for pile_cell_indices in cell_indices_of_piles],
+            )
         )
 
     with ut.timed_step(".collect"):
-        for pile_index, subset_results in enumerate(subset_results_of_piles):
+        metacell_of_cells = ut.get_o_numpy(adata, "metacell", formatter=ut.groups_description).copy()
+        dissolved_of_cells = ut.get_o_numpy(adata, "dissolved").copy()
+        level_of_cells = ut.get_o_numpy(adata, "metacell_level").copy()
+        selected_genes_mask = ut.get_v_numpy(adata, "selected_gene").copy()
+
+        if np.any(collected_mask):
+            max_collected = np.max(metacell_of_cells[collected_mask])
+        else:
+            max_collected = -1
+        assert max_collected + 1 == counts[0]
+
+        full_cell_indices_of_piles: List[ut.NumpyVector] = []
+        metacell_of_cells_of_piles: List[ut.NumpyVector] = []
+        dissolved_of_cells_of_piles: List[ut.NumpyVector] = []
+        for pile_index, pile_subset_results in enumerate(subset_results_of_piles):
+            assert pile_subset_results is not None
             with ut.log_step(
                 "- pile",
                 pile_index,
                 formatter=lambda pile_index: ut.progress_description(piles_count, pile_index, "pile"),
             ):
-                subset_results.collect(
-                    adata=adata,
-                    counts=counts,
-                    collected_mask=collected_mask,
-                    metacells_level=metacells_level,
+                metacell_of_cells_of_piles.append(
+                    pile_subset_results.collect(counts=counts, selected_genes_mask=selected_genes_mask)
                 )
+                full_cell_indices_of_piles.append(pile_subset_results.full_cell_indices)
+                dissolved_of_cells_of_piles.append(pile_subset_results.dissolved)
+            subset_results_of_piles[pile_index] = None
+
+        outliers_count = 0
+        if piles_count > 0:
+            full_cell_indices = np.concatenate(full_cell_indices_of_piles)
+            assert not np.any(collected_mask[full_cell_indices])
+            collected_mask[full_cell_indices] = True
+            metacell_of_piles_cells = np.concatenate(metacell_of_cells_of_piles)
+            outliers_count = int(np.sum(metacell_of_piles_cells < 0))
+            metacell_of_cells[full_cell_indices] = metacell_of_piles_cells
+            dissolved_of_cells[full_cell_indices] = np.concatenate(dissolved_of_cells_of_piles)
+            level_of_cells[full_cell_indices] = metacells_level
+
+        ut.set_o_data(adata, "metacell", metacell_of_cells, formatter=ut.groups_description)
+        ut.set_o_data(adata, "dissolved", dissolved_of_cells)
+        ut.set_o_data(adata, "metacell_level", level_of_cells)
+        ut.set_v_data(adata, "selected_gene", selected_genes_mask)
 
     ut.log_calc("collected counts", counts)
-    return piles_count
+    ut.log_return("outliers_count", outliers_count)
+    return outliers_count
 
 
 # NOTE: Any change here must be reflected in  _compute_divide_and_conquer_subset
@@ -520,10 +520,10 @@ def _min_essential_genes_of_type(
             min_essential_genes_count: Optional[int] = None
         else:
             atlas_essential_genes_mask = ut.get_v_numpy(adata, f"essential_gene_of_{type_name}")
-            atlas_essential_genes_count = np.sum(atlas_essential_genes_mask)
+            atlas_essential_genes_count = int(np.count_nonzero(atlas_essential_genes_mask))
 
             common_essential_genes_mask = ut.get_v_numpy(common_adata, f"essential_gene_of_{type_name}")
-            common_essential_genes_count = np.sum(common_essential_genes_mask)
+            common_essential_genes_count = int(np.count_nonzero(common_essential_genes_mask))
 
             min_essential_genes_count = ceil(project_min_essential_genes_fraction * atlas_essential_genes_count)
             assert min_essential_genes_count is not None
@@ -557,11 +557,11 @@ def _min_essential_genes_of_type(
 
             other_atlas_essential_genes_mask = ut.get_v_numpy(adata, f"essential_gene_of_{type_name}")
             pair_atlas_essential_genes_mask = atlas_essential_genes_mask | other_atlas_essential_genes_mask
-            pair_atlas_essential_genes_count = np.sum(pair_atlas_essential_genes_mask)
+            pair_atlas_essential_genes_count = int(np.count_nonzero(pair_atlas_essential_genes_mask))
 
             other_common_essential_genes_mask = ut.get_v_numpy(common_adata, f"essential_gene_of_{type_name}")
             pair_common_essential_genes_mask = common_essential_genes_mask | other_common_essential_genes_mask
-            pair_common_essential_genes_count = np.sum(pair_common_essential_genes_mask)
+            pair_common_essential_genes_count = int(np.count_nonzero(pair_common_essential_genes_mask))
 
             missing_essential_genes_count = pair_atlas_essential_genes_count - pair_common_essential_genes_count
             assert missing_essential_genes_count >= 0
@@ -127,7 +127,7 @@ def relate_to_lateral_genes(  # pylint: disable=too-many-statements
             reproducible=random_seed != 0,
         )
         max_correlation_per_candidate = ut.max_per(correlation_per_related_per_candidate, per="row")
-        assert len(max_correlation_per_candidate) == np.sum(candidate_genes_mask)
+        assert len(max_correlation_per_candidate) == np.count_nonzero(candidate_genes_mask)
 
         additional_genes_mask = np.zeros(sdata.n_vars, dtype="bool")
         additional_genes_mask[candidate_genes_mask] = max_correlation_per_candidate >= min_gene_correlation
@@ -8,6 +8,7 @@ from typing import Callable
 from typing import Dict
 from typing import NamedTuple
 from typing import Optional
+from typing import Tuple
 from typing import Union
 
 import numpy as np
@@ -95,6 +96,16 @@ def apply_obs_annotations(
          :py:attr:`DefaultValues.full` value.
 
     4. Apply the slice data values to the entries of the full data identified by the ``indices``.
+
+    A new full annotation is created with a type which can hold both the
+    :py:attr:`DefaultValues.full` value and the slice values. A ``bool`` default gives a ``bool``
+    annotation. An ``int`` default uses the type of integer slice data if it can hold the default,
+    and ``int64`` otherwise. A ``float`` default gives a ``float32`` annotation if the slice data is
+    ``float32``, and ``float64`` otherwise. Any other default (e.g. a string) gives an ``object``
+    annotation, and a ``None`` default gives a ``float32`` annotation of ``NaN`` values. If the full
+    annotation already exists and its type can't hold the slice values (e.g. ``float`` values
+    applied to an ``int`` annotation), it is widened to a type that can, instead of silently
+    truncating the values.
     """
     _apply_annotations(adata, sdata, "o", annotations, indices)
 
@@ -143,6 +154,16 @@ def apply_var_annotations(
          :py:attr:`DefaultValues.full` value.
 
     4. Apply the slice data values to the entries of the full data identified by the ``indices``.
+
+    A new full annotation is created with a type which can hold both the
+    :py:attr:`DefaultValues.full` value and the slice values. A ``bool`` default gives a ``bool``
+    annotation. An ``int`` default uses the type of integer slice data if it can hold the default,
+    and ``int64`` otherwise. A ``float`` default gives a ``float32`` annotation if the slice data is
+    ``float32``, and ``float64`` otherwise. Any other default (e.g. a string) gives an ``object``
+    annotation, and a ``None`` default gives a ``float32`` annotation of ``NaN`` values. If the full
+    annotation already exists and its type can't hold the slice values (e.g. ``float`` values
+    applied to an ``int`` annotation), it is widened to a type that can, instead of silently
+    truncating the values.
     """
     _apply_annotations(adata, sdata, "v", annotations, indices)
 
@@ -156,6 +177,8 @@ def _apply_annotations(  # pylint: disable=too-many-branches
 ) -> None:
     full_name = ut.get_name(adata)
     slice_name = ut.get_name(sdata)
+    full_unknown = "unknown full data name" if full_name is None else f"unknown full data: {full_name} name"
+    slice_unknown = "unknown slice data name" if slice_name is None else f"unknown slice data: {slice_name} name"
 
     assert per in ("o", "v")
 
@@ -165,53 +188,132 @@ def _apply_annotations(  # pylint: disable=too-many-branches
         slice_data = sdata.obs
         slice_size = sdata.n_obs
         full_indices = ut.get_o_numpy(sdata, indices)
+        set_data = ut.set_o_data
     else:
         full_data = adata.var
         full_size = adata.n_vars
         slice_data = sdata.var
         slice_size = sdata.n_vars
         full_indices = ut.get_v_numpy(sdata, indices)
+        set_data = ut.set_v_data
+
+    assert full_indices.size == slice_size
+
+    # A slice of consecutive entries is written with a plain copy instead of an indexed scatter. Otherwise, convert the
+    # indices once to the native index type, instead of in each annotation's scatter.
+    full_positions: Union[ut.NumpyVector, slice]
+    if full_indices.size > 0 and np.all(np.diff(full_indices) == 1):
+        full_positions = slice(int(full_indices[0]), int(full_indices[-1]) + 1)
+    else:
+        full_positions = full_indices.astype("intp", copy=False)
+
+    slice_names = set(slice_data.columns)
+    full_names = set(full_data.columns)
+
+    # Applying the data onto itself leaves every existing annotation unchanged.
+    is_self = sdata is adata and isinstance(full_positions, slice) and full_positions == slice(0, full_size)
 
-    for name, default_values in annotations.items():
-        slice_value = slice_data.get(name)
+    # Annotations missing from the slice data with a ``Skip`` default are ignored, so don't fetch their full data.
+    applied_names = [
+        name
+        for name, default_values in annotations.items()
+        if (name in slice_names and not is_self)
+        or (name not in slice_names and not (default_values.slice is Skip or isinstance(default_values.slice, Skip)))
+    ]
+    if len(applied_names) == 0:
+        return
+
+    slice_columns = {name: ut.to_numpy_vector(slice_data[name]) for name in applied_names if name in slice_names}
+    full_columns = {name: ut.to_numpy_vector(full_data[name]) for name in applied_names if name in full_names}
+
+    # Annotations sharing the same scalar full default copy a single pre-filled vector instead of each filling its own.
+    defaults_cache: Dict[Tuple[str, type, Any], ut.NumpyVector] = {}
+
+    for name in applied_names:
+        slice_default, full_default = annotations[name]
+        slice_value = slice_columns.get(name)
         if slice_value is not None:
             formatter: Optional[Callable[[Any], str]] = None
         else:
-            if default_values.slice == Skip or isinstance(default_values.slice, Skip):
-                continue
+            if slice_default is Raise or isinstance(slice_default, Raise):
+                raise KeyError(f"{slice_unknown}: {name}")
 
-            if default_values.slice == Raise or isinstance(default_values.slice, Raise):
-                if slice_name is None:
-                    raise KeyError(f"unknown slice data name: {name}")
-                raise KeyError(f"unknown slice data: {slice_name} name: {name}")
-
-            slice_value = default_values.slice
+            slice_value = slice_default
 
             def formatter(_: Any) -> str:
                 # pylint: disable=cell-var-from-loop
+                if isinstance(slice_value, np.ndarray):
+                    return f"{slice_size} <- {slice_value.shape} {slice_value.dtype}s"
                 return f"{slice_size} <- {slice_value}"
 
             # pylint: enable=cell-var-from-loop
 
-        full_value = full_data.get(name)
+        full_value = full_columns.get(name)
+        full_value_is_default = full_value is None
         if full_value is not None:
-            ut.unfreeze(full_value)
+            # Copy the existing values into a type that can also hold the new slice values, so these are not truncated.
+            full_value = full_value.astype(
+                _common_dtype(full_value.dtype, _value_dtype(slice_value, full_value.dtype)), copy=True
+            )
         else:
-            if default_values.full == Skip or isinstance(default_values.full, Skip):
+            if full_default is Skip or isinstance(full_default, Skip):
                 continue
 
-            if default_values.full == Raise or isinstance(default_values.full, Raise):
-                if full_name is None:
-                    raise KeyError(f"unknown full data name: {name}")
-                raise KeyError(f"unknown full data: {full_name} name: {name}")
+            if full_default is Raise or isinstance(full_default, Raise):
+                raise KeyError(f"{full_unknown}: {name}")
 
-            if default_values.full is None:
+            if full_default is None:
                 full_value = np.full(full_size, None, dtype="float32")
             else:
-                full_value = np.full(full_size, default_values.full)
-
-        full_value[full_indices] = slice_value
-        if per == "o":
-            ut.set_o_data(adata, name, full_value, formatter=formatter)
-        else:
-            ut.set_v_data(adata, name, full_value, formatter=formatter)
+                dtype = _dtype_for_default(full_default, slice_value)
+                if not np.isscalar(full_default):
+                    full_value = np.full(full_size, full_default, dtype=dtype)
+                else:
+                    default_key = (str(dtype), type(full_default), full_default)
+                    default_value = defaults_cache.get(default_key)
+                    if default_value is None:
+                        default_value = np.full(full_size, full_default, dtype=dtype)
+                        defaults_cache[default_key] = default_value
+                    full_value = default_value.copy()
+
+        # Scattering the same scalar the full vector was just filled with would not change anything.
+        if not (
+            full_value_is_default
+            and np.isscalar(slice_value)
+            and np.isscalar(full_default)
+            and slice_value == full_default
+        ):
+            full_value[full_positions] = slice_value
+        set_data(adata, name, full_value, formatter=formatter)
+
+
+def _dtype_for_default(default_value: Any, slice_value: Any) -> np.dtype:
+    # The type of a new full annotation is the type of the default value (see ``_value_dtype``), widened to also hold
+    # the slice values which are scattered into it.
+    slice_dtype = _value_dtype(slice_value, None)
+    return _common_dtype(_value_dtype(default_value, slice_dtype), slice_dtype)
+
+
+def _value_dtype(value: Any, other_dtype: Optional[np.dtype]) -> np.dtype:
+    # The type of a vector or numpy scalar, or the type to use for a single Python value: ``bool`` for booleans, the
+    # ``other_dtype`` for integers if it is an integer type that can hold the value (otherwise ``int64``, as numpy would
+    # choose), ``float32`` for floats if ``other_dtype`` is ``float32`` (otherwise ``float64``), and ``object`` for
+    # anything else (e.g. strings, which would otherwise be truncated to the length of the default).
+    if isinstance(value, (np.ndarray, np.generic)):
+        return value.dtype
+    if isinstance(value, bool):
+        return np.dtype("bool")
+    if isinstance(value, int):
+        if other_dtype is not None and other_dtype.kind in "iu" and np.can_cast(np.min_scalar_type(value), other_dtype):
+            return other_dtype
+        return np.dtype("int64")
+    if isinstance(value, float):
+        return np.dtype("float32" if other_dtype == "float32" else "float64")
+    return np.dtype("object")
+
+
+def _common_dtype(left: np.dtype, right: np.dtype) -> np.dtype:
+    try:
+        return np.result_type(left, right)
+    except TypeError:  # E.g., strings and numbers.
+        return np.dtype("object")
@@ -141,7 +141,7 @@ def find_bursty_lonely_genes(  # pylint: disable=too-many-statements
         assert htv_mask_series is not None
         htv_mask = ut.to_numpy_vector(htv_mask_series)
 
-        htv_genes_count = np.sum(htv_mask)
+        htv_genes_count = int(np.count_nonzero(htv_mask))
         assert htv_genes_count <= ht_genes_count
 
         if htv_genes_count > 0:
@@ -151,7 +151,7 @@ def find_bursty_lonely_genes(  # pylint: disable=too-many-statements
 
             max_similarity_of_htv_genes = ut.max_per(htv_gene_ht_gene_similarity_matrix, per="row")
             htvl_mask = max_similarity_of_htv_genes <= max_gene_similarity
-            htvl_genes_count = np.sum(htvl_mask)
+            htvl_genes_count = int(np.count_nonzero(htvl_mask))
             ut.log_calc("bursty_lonely_genes_count", htvl_genes_count)
 
             if htvl_genes_count > 0:
@@ -123,6 +123,10 @@ def compute_candidate_metacells(  # pylint: disable=too-many-statements
     outgoing_edge_weights = ut.mustbe_compressed_matrix(edge_weights)
 
     assert ut.is_layout(outgoing_edge_weights, "row_major")
+    if not outgoing_edge_weights.has_sorted_indices:
+        # Sort a copy, as the matrix may be (frozen) data owned by the caller.
+        outgoing_edge_weights = outgoing_edge_weights.copy()
+        ut.sort_compressed_indices(outgoing_edge_weights)
     incoming_edge_weights = ut.mustbe_compressed_matrix(ut.to_layout(outgoing_edge_weights, layout="column_major"))
     assert ut.is_layout(incoming_edge_weights, "column_major")
 
@@ -178,7 +182,7 @@ def compute_candidate_metacells(  # pylint: disable=too-many-statements
     old_score = 1e9
     old_communities = community_of_nodes
     old_small_nodes_count = len(community_of_nodes)
-    atomic_candidates: Set[Tuple[int, ...]] = set()
+    atomic_candidates: Set[bytes] = set()
     kept_communities_count = 0
 
     while True:
@@ -274,7 +278,7 @@ def _reduce_communities(
     cooldown_phase: float,
     kept_communities_count: int,
     cold_temperature: float,
-    atomic_candidates: Set[Tuple[int, ...]],
+    atomic_candidates: Set[bytes],
 ) -> Tuple[float, float]:
     np.random.seed(random_seed)
     while True:
@@ -299,6 +303,7 @@ def _reduce_communities(
 
         split_communities_count, cut_communities_count = _cut_split_communities(
             outgoing_edge_weights=outgoing_edge_weights,
+            incoming_edge_weights=incoming_edge_weights,
             community_of_nodes=community_of_nodes,
             node_sizes=node_sizes,
             min_metacell_cells=min_metacell_cells,
@@ -329,6 +334,7 @@ def _reduce_communities(
 def _cut_split_communities(
     *,
     outgoing_edge_weights: ut.CompressedMatrix,
+    incoming_edge_weights: ut.CompressedMatrix,
     community_of_nodes: ut.NumpyVector,
     node_sizes: ut.NumpyVector,
     min_metacell_cells: Optional[int],
@@ -336,7 +342,7 @@ def _cut_split_communities(
     max_split_min_cut_strength: Optional[float],
     min_cut_seed_cells: int,
     must_complete_cover: bool,
-    atomic_candidates: Set[Tuple[int, ...]],
+    atomic_candidates: Set[bytes],
 ) -> Tuple[int, int]:
     communities_count = np.max(community_of_nodes) + 1
     assert communities_count > 0
@@ -349,40 +355,42 @@ def _cut_split_communities(
     cut_communities_count = 0
     next_new_community_index = communities_count
 
-    for community_index in range(communities_count):
-        community_mask = community_of_nodes == community_index
-        community_node_sizes = node_sizes[community_mask]
-        community_size = np.sum(community_node_sizes)
+    # Splitting or cutting a community only moves its own nodes to new (or no) communities, so the nodes of the rest of
+    # the original communities are collected once up front.
+    node_indices_of_communities = ut.group_indices(community_of_nodes, groups_count=communities_count)
+    _, size_of_communities = _communities_nodes_count_and_size(community_of_nodes, node_sizes, communities_count)
+
+    for community_index, community_indices in enumerate(node_indices_of_communities):
+        community_size = size_of_communities[community_index]
 
         if (
             max_metacell_size is not None
             and community_size > max_metacell_size
-            and (min_metacell_cells is None or np.sum(community_mask) >= 2 * min_metacell_cells)
+            and (min_metacell_cells is None or len(community_indices) >= 2 * min_metacell_cells)
         ):
             ut.logger().debug(
-                "community: %s nodes: %s size: %s is too large", community_index, np.sum(community_mask), community_size
+                "community: %s nodes: %s size: %s is too large", community_index, len(community_indices), community_size
             )
-            large_community_indices = np.where(community_mask)[0]
-            second_partition_indices = large_community_indices[
-                np.random.choice([False, True], size=len(large_community_indices))
-            ]
+            second_partition_indices = community_indices[np.random.choice([False, True], size=len(community_indices))]
             community_of_nodes[second_partition_indices] = next_new_community_index
             next_new_community_index += 1
             split_communities_count += 1
             continue
 
     if split_communities_count == 0 and max_split_min_cut_strength is not None:
-        for community_index in range(communities_count):
-            community_mask = community_of_nodes == community_index
-
-            community_indices = tuple(np.where(community_mask)[0])
-            if community_indices in atomic_candidates:
+        for community_index, community_indices in enumerate(node_indices_of_communities):
+            # The raw bytes of the (sorted) node indices identify the community as well as a tuple of them would, but
+            # are much cheaper to build and hash.
+            community_key = community_indices.tobytes()
+            if community_key in atomic_candidates:
                 continue
 
             action = _min_cut_community(
                 outgoing_edge_weights=outgoing_edge_weights,
+                incoming_edge_weights=incoming_edge_weights,
                 community_of_nodes=community_of_nodes,
                 cut_community_index=community_index,
+                community_indices=community_indices,
                 max_split_min_cut_strength=max_split_min_cut_strength,
                 min_cut_seed_cells=min_cut_seed_cells,
                 must_complete_cover=must_complete_cover,
@@ -390,14 +398,14 @@ def _cut_split_communities(
             )
 
             if action == "unchanged":
-                atomic_candidates.add(community_indices)
+                atomic_candidates.add(community_key)
                 continue
 
             ut.logger().debug(
                 "community: %s nodes: %s size: %s was %s",
                 community_index,
-                np.sum(community_mask),
-                community_size,
+                len(community_indices),
+                size_of_communities[community_index],
                 action,
             )
             if action == "split":
@@ -419,25 +427,27 @@ def _cut_split_communities(
 
 def _min_cut_community(
     outgoing_edge_weights: ut.CompressedMatrix,
+    incoming_edge_weights: ut.CompressedMatrix,
     community_of_nodes: ut.NumpyVector,
     cut_community_index: int,
+    community_indices: ut.NumpyVector,
     max_split_min_cut_strength: float,
     min_cut_seed_cells: int,
     must_complete_cover: bool,
     new_community_index: int,
 ) -> str:
-    community_mask = community_of_nodes == cut_community_index
-    if np.sum(community_mask) < 2:
+    if len(community_indices) < 2:
         return "unchanged"
-    community_edge_weights = outgoing_edge_weights[community_mask, :][:, community_mask]
-    community_edge_weights += community_edge_weights.T
+    # The transpose of the column-major submatrix is a row-major matrix (without copying), so the two submatrices are
+    # summed without converting either to the other's layout.
+    community_edge_weights = outgoing_edge_weights[community_indices, :][:, community_indices]
+    community_edge_weights += incoming_edge_weights[:, community_indices][community_indices, :].T
 
     cut, cut_strength = ut.min_cut(community_edge_weights)
     if cut_strength is None:
         return "unchanged"
 
     if cut_strength == 0:
-        community_indices = np.where(community_mask)[0]
         if len(cut.partition[0]) < len(cut.partition[1]):
             small_partition = 0
         else:
@@ -456,7 +466,6 @@ def _min_cut_community(
         cut_strength,
     )
 
-    community_indices = np.where(community_mask)[0]
     if len(cut.partition[0]) < len(cut.partition[1]):
         small_partition = 0
     else:
@@ -490,14 +499,16 @@ def _find_small_communities(
         ut.logger().debug("no communities are too small")
         return (set(), communities_count)
 
+    nodes_count_of_communities, size_of_communities = _communities_nodes_count_and_size(
+        community_of_nodes, node_sizes, communities_count
+    )
+
     small_communities: Set[int] = set()
     small_nodes_count = 0
 
     for community_index in range(communities_count):
-        community_mask = community_of_nodes == community_index
-        community_nodes_count = np.sum(community_mask)
-        community_node_sizes = node_sizes[community_mask]
-        community_size = np.sum(community_node_sizes)
+        community_nodes_count = nodes_count_of_communities[community_index]
+        community_size = size_of_communities[community_index]
 
         if min_metacell_cells is not None and community_nodes_count < min_metacell_cells:
             ut.logger().debug("community: %s nodes: %s is too few", community_index, community_nodes_count)
@@ -514,18 +525,33 @@ def _find_small_communities(
     return (small_communities, small_nodes_count)
 
 
-def _cancel_communities(community_of_nodes: ut.NumpyVector, cancelled_communities: Set[int]) -> int:
-    communities_count = np.max(community_of_nodes) + 1
-    kept_communities_count = 0
-    for community_index in range(communities_count):
-        if community_index in cancelled_communities:
-            community_of_nodes[community_of_nodes == community_index] = -1
-            continue
+def _communities_nodes_count_and_size(
+    community_of_nodes: ut.NumpyVector, node_sizes: ut.NumpyVector, communities_count: int
+) -> Tuple[ut.NumpyVector, ut.NumpyVector]:
+    # The number of nodes and the total size of the nodes of each community, ignoring the outlier (negative) nodes. The
+    # weighted ``np.bincount`` always sums in ``float64``, so convert the sizes back to the type of the node sizes.
+    grouped_mask = community_of_nodes >= 0
+    grouped_communities = community_of_nodes[grouped_mask]
+    nodes_count_of_communities = np.bincount(grouped_communities, minlength=communities_count)
+    size_of_communities = np.bincount(
+        grouped_communities, weights=node_sizes[grouped_mask], minlength=communities_count
+    ).astype(node_sizes.dtype)
+    return (nodes_count_of_communities, size_of_communities)
 
-        if community_index > kept_communities_count:
-            community_of_nodes[community_of_nodes == community_index] = kept_communities_count
 
-        kept_communities_count += 1
+def _cancel_communities(community_of_nodes: ut.NumpyVector, cancelled_communities: Set[int]) -> int:
+    communities_count = np.max(community_of_nodes) + 1
+    kept_communities_mask = np.ones(communities_count, dtype="bool")
+    kept_communities_mask[list(cancelled_communities)] = False
+    kept_communities_count = int(np.count_nonzero(kept_communities_mask))
+
+    # The extra last entry maps the already-outlier (-1) nodes to remain outliers. The table is of the same type as the
+    # community indices, so the in-place update below keeps them in the (int32) type the extension expects.
+    new_community_of_communities = np.full(communities_count + 1, -1, dtype=community_of_nodes.dtype)
+    new_community_of_communities[:-1][kept_communities_mask] = np.arange(
+        kept_communities_count, dtype=community_of_nodes.dtype
+    )
+    community_of_nodes[:] = new_community_of_communities[community_of_nodes]
 
     assert kept_communities_count == communities_count - len(cancelled_communities)
     return kept_communities_count
@@ -154,9 +154,7 @@ def find_deviant_cells(  # pylint: disable=too-many-statements,too-many-branches
     umis_per_gene_per_cell = ut.get_vo_proper(adata, what, layout="row_major")
 
     fold_per_gene_per_cell = np.zeros(adata.shape, dtype="float32")
-    for candidate_index in range(candidates_count):
-        candidate_cell_indices = np.where(candidate_of_cells == candidate_index)[0]
-
+    for candidate_cell_indices in ut.group_indices(candidate_of_cells, groups_count=candidates_count):
         candidate_cells_count = candidate_cell_indices.size
         assert candidate_cells_count > 0
 
@@ -265,9 +263,7 @@ def _gaps_deviant_cells(  # pylint: disable=too-many-statements
     candidate_per_cell = ut.get_o_numpy(adata, candidates, formatter=ut.groups_description).astype("int32")
     candidates_count = np.max(candidate_per_cell) + 1
 
-    umis_per_gene_per_cell = ut.to_numpy_matrix(ut.get_vo_proper(adata, what, layout="row_major"), copy=True).astype(
-        "float32"
-    )
+    umis_per_gene_per_cell = ut.to_numpy_matrix(ut.get_vo_proper(adata, what, layout="row_major")).astype("float32")
 
     regularization_per_cell = np.empty(cells_count, dtype="float32")
     max_gap_per_cell = np.empty(cells_count, dtype="float32")
@@ -277,14 +273,13 @@ def _gaps_deviant_cells(  # pylint: disable=too-many-statements
     total_umis_per_cell = ut.get_o_numpy(adata, what, sum=True).copy()
     fraction_per_gene_per_cell = umis_per_gene_per_cell / total_umis_per_cell[:, np.newaxis]
 
-    for candidate_index in range(candidates_count):
-        mask_per_cell = candidate_per_cell == candidate_index
-        total_umis_per_cell_of_candidate = total_umis_per_cell[mask_per_cell]
+    for cell_indices_of_candidate in ut.group_indices(candidate_per_cell, groups_count=candidates_count):
+        total_umis_per_cell_of_candidate = total_umis_per_cell[cell_indices_of_candidate]
         regularization_of_candidate = max(
             1.0, np.quantile(total_umis_per_cell_of_candidate, cells_regularization_quantile)
         )
         regularization_per_cell_of_candidate = np.maximum(total_umis_per_cell_of_candidate, regularization_of_candidate)
-        regularization_per_cell[mask_per_cell] = 1.0 / regularization_per_cell_of_candidate
+        regularization_per_cell[cell_indices_of_candidate] = 1.0 / regularization_per_cell_of_candidate
     ut.log_calc("regularization_per_cell", regularization_per_cell, formatter=ut.sizes_description)
 
     log_fraction_per_gene_per_cell = np.log2(fraction_per_gene_per_cell + regularization_per_cell[:, np.newaxis])
@@ -432,7 +427,7 @@ def _votes_deviant_cells(
         if did_reach_max_deviant_cells or np.all(remaining_cells_mask):
             break
 
-        max_deviant_cells_count -= np.sum(~remaining_cells_mask)
+        max_deviant_cells_count -= int(np.count_nonzero(~remaining_cells_mask))
         assert max_deviant_cells_count > 0
 
         ut.log_calc("acceptable_cells_mask", acceptable_cells_mask)
@@ -471,9 +466,7 @@ def _collect_fold_factors(  # pylint: disable=too-many-statements
     ut.timed_parameters(candidates=candidates_count, cells=cells_count, genes=genes_count)
     remaining_cells_count = cells_count
 
-    for candidate_index in range(candidates_count):
-        candidate_cell_indices = np.where(candidate_of_cells == candidate_index)[0]
-
+    for candidate_cell_indices in ut.group_indices(candidate_of_cells, groups_count=candidates_count):
         candidate_cells_count = candidate_cell_indices.size
         if candidate_cells_count == 0:
             continue
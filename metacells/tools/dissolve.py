@@ -114,8 +114,8 @@ def dissolve_metacells(
     ut.log_calc("min_convincing_size", min_convincing_size)
 
     did_dissolve = False
-    for candidate_index in range(candidates_count):
-        candidate_cell_indices = np.where(candidate_of_cells == candidate_index)[0]
+    cell_indices_of_candidates = ut.group_indices(candidate_of_cells, groups_count=candidates_count)
+    for candidate_index, candidate_cell_indices in enumerate(cell_indices_of_candidates):
         if not _keep_candidate(
             candidate_index,
             data=data,
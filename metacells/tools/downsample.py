@@ -80,7 +80,14 @@ def downsample_cells(
     3. Downsample each cell so that it has at most the selected number of samples. Specify a non-zero
        ``random_seed`` to make this reproducible.
     """
-    total_per_cell = ut.get_o_numpy(adata, what, sum=True)
+    data = ut.get_vo_proper(adata, what, layout="row_major")
+    assert ut.shaped_dtype(data) == "float32"
+
+    # Named data have their sums cached, otherwise sum the row-major data we need for the downsampling anyway.
+    if isinstance(what, str):
+        total_per_cell = ut.get_o_numpy(adata, what, sum=True)
+    else:
+        total_per_cell = ut.sum_per(data, per="row")
 
     samples = int(
         round(
@@ -93,8 +100,6 @@ def downsample_cells(
 
     ut.log_calc("samples", samples)
 
-    data = ut.get_vo_proper(adata, what, layout="row_major")
-    assert ut.shaped_dtype(data) == "float32"
     downsampled = ut.downsample_matrix(data, per="row", samples=samples, random_seed=random_seed)
     if inplace:
         ut.set_vo_data(adata, "downsampled", downsampled)
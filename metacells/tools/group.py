@@ -79,7 +79,9 @@ def group_obs_data(
 
     gdata = AnnData(summed_data)
     gdata.var_names = adata.var_names
-    gdata.obs_names = _obs_names(prefix or "", ut.to_numpy_vector(adata.obs_names), group_of_cells)
+    gdata.obs_names = _obs_names(
+        prefix or "", ut.to_numpy_vector(adata.obs_names), ut.group_indices(group_of_cells, groups_count=gdata.n_obs)
+    )
 
     ut.set_name(gdata, ut.get_name(adata))
     ut.set_name(gdata, name)
@@ -90,15 +92,15 @@ def group_obs_data(
 
 
 # TODO: Replicated in metacells.pipeline.collect
-def _obs_names(prefix: str, name_of_members: ut.NumpyVector, group_of_members: ut.NumpyVector) -> List[str]:
-    groups_count = np.max(group_of_members) + 1
+def _obs_names(
+    prefix: str, name_of_members: ut.NumpyVector, member_indices_of_groups: List[ut.NumpyVector]
+) -> List[str]:
     name_of_groups: List[str] = []
     prefix = prefix or ""
-    for group_index in range(groups_count):
-        groups_mask = group_of_members == group_index
-        assert np.any(groups_mask)
+    for group_index, member_indices in enumerate(member_indices_of_groups):
+        assert len(member_indices) > 0
         hasher = shake_128()
-        for member_name in name_of_members[groups_mask]:
+        for member_name in name_of_members[member_indices]:
             hasher.update(member_name.encode("utf8"))
         checksum = int(hasher.hexdigest(16), 16) % 10
         name_of_groups.append(f"{prefix}{group_index}.{checksum:02d}")
@@ -156,9 +158,9 @@ def group_obs_annotation(
 
        ``majority``
             Use the most common value across all cells in the group as the value for the whole
-            group. If this value doesn't have at least ``min_value_fraction`` (default:
-            {min_value_fraction}) of the cells, use the ``conflict`` (default: {conflict}) value
-            instead.
+            group. If several values are equally common, use the lowest of them. If this value
+            doesn't have at least ``min_value_fraction`` (default: {min_value_fraction}) of the
+            cells, use the ``conflict`` (default: {conflict}) value instead.
     """
     group_of_cells = ut.get_o_numpy(adata, groups, formatter=ut.groups_description)
     values_of_cells = ut.get_o_numpy(adata, name, formatter=formatter)
@@ -175,19 +177,28 @@ def group_obs_annotation(
     else:
         assert method == "majority"
         with ut.timed_step(".majority"):
-            for group_index in range(gdata.n_obs):
-                cells_mask = group_of_cells == group_index
-                cells_count = np.sum(cells_mask)
-                assert cells_count > 0
-                values_of_cells_of_group = values_of_cells[cells_mask]
-                unique_values_of_group, unique_counts_of_group = np.unique(values_of_cells_of_group, return_counts=True)
-                majority_index = np.argmax(unique_counts_of_group)
-                majority_count = unique_counts_of_group[majority_index]
-                if majority_count / cells_count < min_value_fraction:
-                    value_of_groups[group_index] = conflict
-                else:
-                    majority_value = unique_values_of_group[majority_index]
-                    value_of_groups[group_index] = majority_value
+            grouped_mask = group_of_cells >= 0
+            group_of_grouped_cells = group_of_cells[grouped_mask].astype("int64")
+            cells_count_of_groups = np.bincount(group_of_grouped_cells, minlength=gdata.n_obs)
+            assert cells_count_of_groups.size == gdata.n_obs
+            assert np.all(cells_count_of_groups > 0)
+
+            unique_values, value_index_of_grouped_cells = np.unique(values_of_cells[grouped_mask], return_inverse=True)
+            unique_values_count = len(unique_values)
+            unique_keys, count_of_keys = np.unique(
+                group_of_grouped_cells * unique_values_count + value_index_of_grouped_cells.reshape(-1),
+                return_counts=True,
+            )
+            group_of_keys = unique_keys // unique_values_count
+            value_index_of_keys = unique_keys % unique_values_count
+
+            # Per group, the most common value first, breaking ties in favor of the lowest value.
+            order = np.lexsort((value_index_of_keys, -count_of_keys, group_of_keys))
+            first_key_of_groups = order[np.searchsorted(group_of_keys[order], np.arange(gdata.n_obs))]
+            majority_count_of_groups = count_of_keys[first_key_of_groups]
+
+            value_of_groups[:] = unique_values[value_index_of_keys[first_key_of_groups]]
+            value_of_groups[majority_count_of_groups / cells_count_of_groups < min_value_fraction] = conflict
 
     if inplace:
         ut.set_o_data(gdata, name, value_of_groups)
@@ -300,7 +300,7 @@ def compute_similar_query_metacells(
             essential_genes_mask |= ut.get_v_numpy(qdata, property_name)
 
         ut.log_calc("essential_genes_mask", essential_genes_mask)
-        essential_genes_count = np.sum(essential_genes_mask)
+        essential_genes_count = int(np.count_nonzero(essential_genes_mask))
         if essential_genes_count > 0:
             ut.log_calc("essential_gene_names", qdata.var_names[essential_genes_mask])
             misfit_per_essential_gene_per_metacell = misfit_per_gene_per_metacell[:, essential_genes_mask]
@@ -524,7 +524,7 @@ def _compute_cell_deviant_folds(
 
     gene_indices = np.where(total_umis_per_gene >= min_gene_total)[0].astype("int32")
     ut.log_calc("nnz_fold_genes_count", len(gene_indices))
-    return (gene_indices.astype("int32"), fold_factors[gene_indices].astype("float32"))
+    return (gene_indices, fold_factors[gene_indices].astype("float32"))
 
 
 @ut.logged()
@@ -578,7 +578,7 @@ def _compute_metacell_inner_folds(
     deviant_fold_per_gene_per_cell: ut.ProperMatrix,
 ) -> Tuple[ut.NumpyVector, ut.NumpyVector]:
     cells_mask = group_per_cell == metacell_index
-    cells_count = np.sum(cells_mask)
+    cells_count = int(np.count_nonzero(cells_mask))
     assert cells_count > 0
     genes_count = deviant_fold_per_gene_per_cell.shape[1]
 
@@ -599,7 +599,7 @@ def _compute_metacell_inner_folds(
 
     gene_indices = np.where(max_deviant_fold_per_gene != 0.0)[0].astype("int32")
     ut.log_calc("nnz_fold_genes_count", len(gene_indices))
-    return (gene_indices.astype("int32"), max_deviant_fold_per_gene[gene_indices].astype("float32"))
+    return (gene_indices, max_deviant_fold_per_gene[gene_indices].astype("float32"))
 
 
 @ut.logged()
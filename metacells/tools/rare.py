@@ -580,7 +580,7 @@ def _compress_modules(
             formatter=lambda module_index: ut.progress_description(modules_count, module_index, "module"),
         ):
             module_cells_mask = rare_module_of_cells == module_index
-            module_cells_count = np.sum(module_cells_mask)
+            module_cells_count = int(np.count_nonzero(module_cells_mask))
 
             if module_cells_count < min_cells_of_modules:
                 if ut.logging_calc():
@@ -606,7 +606,7 @@ def _compress_modules(
             list_of_rare_gene_indices_of_modules.append(gene_indices_of_module)
 
             if ut.logging_calc():
-                cell_counts_of_modules.append(np.sum(module_cells_mask))
+                cell_counts_of_modules.append(int(np.count_nonzero(module_cells_mask)))
             list_of_names_of_genes_of_modules.append(  #
                 sorted(adata_of_all_genes_of_all_cells.var_names[gene_indices_of_module])
             )
@@ -107,6 +107,7 @@ __all__ = [
     "sliding_window_function",
     "patterns_matches",
     "compress_indices",
+    "group_indices",
     "bin_pack",
     "bin_fill",
     "sum_groups",
@@ -114,6 +115,7 @@ __all__ = [
     "cover_diameter",
     "cover_coordinates",
     "random_piles",
+    "random_piles_count",
     "represent",
     "min_cut",
     "sparsify_matrix",
@@ -1065,8 +1067,7 @@ def mean_per(matrix: utt.Matrix, *, per: Optional[str]) -> utt.NumpyVector:
     ``column_major`` for operating on columns).
     """
     per = _ensure_per_for("mean", matrix, per)
-    axis = 1 - utt.PER_OF_AXIS.index(per)
-    return sum_per(matrix, per=per) / matrix.shape[axis]
+    return _mean_per(matrix, per, sum_per(matrix, per=per))
 
 
 @utm.timed_call()
@@ -1530,7 +1531,10 @@ def variance_per(matrix: utt.Matrix, *, per: Optional[str]) -> utt.NumpyVector:
     ``column_major`` for operating on columns).
     """
     per = _ensure_per_for("variance", matrix, per)
-    sum_per_element = sum_per(matrix, per=per)
+    return _variance_per(matrix, per, sum_per(matrix, per=per))
+
+
+def _variance_per(matrix: utt.Matrix, per: str, sum_per_element: utt.NumpyVector) -> utt.NumpyVector:
     sum_squared_per_element = sum_squared_per(matrix, per=per)
     axis = 1 - utt.PER_OF_AXIS.index(per)
     size = matrix.shape[axis]
@@ -1554,8 +1558,24 @@ def normalized_variance_per(matrix: utt.Matrix, *, per: Optional[str], zero_valu
 
     If all the values are zero, writes the ``zero_value`` (default: {zero_value}) into the result.
     """
-    variance_per_element = variance_per(matrix, per=per)
-    mean_per_element = mean_per(matrix, per=per)
+    per = _ensure_per_for("normalized_variance", matrix, per)
+    sum_per_element = sum_per(matrix, per=per)
+    return _normalized_variance_per(matrix, per, sum_per_element, _mean_per(matrix, per, sum_per_element), zero_value)
+
+
+def _mean_per(matrix: utt.Matrix, per: str, sum_per_element: utt.NumpyVector) -> utt.NumpyVector:
+    axis = 1 - utt.PER_OF_AXIS.index(per)
+    return sum_per_element / matrix.shape[axis]
+
+
+def _normalized_variance_per(
+    matrix: utt.Matrix,
+    per: str,
+    sum_per_element: utt.NumpyVector,
+    mean_per_element: utt.NumpyVector,
+    zero_value: float,
+) -> utt.NumpyVector:
+    variance_per_element = _variance_per(matrix, per, sum_per_element)
     zeros_mask = mean_per_element == 0
     result = np.reciprocal(mean_per_element, where=~zeros_mask)
     result[zeros_mask] = 0
@@ -1580,9 +1600,13 @@ def relative_variance_per(
     ``column``, and the matrix must be in the appropriate layout (``row_major`` operating on rows,
     ``column_major`` for operating on columns).
     """
-    normalized_variance_per_element = normalized_variance_per(matrix, per=per)
+    per = _ensure_per_for("relative_variance", matrix, per)
+    sum_per_element = sum_per(matrix, per=per)
+    mean_per_element = _mean_per(matrix, per, sum_per_element)
+    normalized_variance_per_element = _normalized_variance_per(
+        matrix, per, sum_per_element, mean_per_element, zero_value=1.0
+    )
     np.log2(normalized_variance_per_element, out=normalized_variance_per_element)
-    mean_per_element = mean_per(matrix, per=per)
     median_variance_per_element = sliding_window_function(
         normalized_variance_per_element, function="median", window_size=window_size, order_by=mean_per_element
     )
@@ -1938,11 +1962,48 @@ def compress_indices(indices: utt.Vector) -> utt.NumpyVector:
     If the group indices contain ``-1`` ("outliers"), then it is preserved as ``-1`` in the result.
     """
     indices = utt.to_numpy_vector(indices)
+    if indices.size == 0:
+        return indices.copy()
+
+    if indices.dtype.kind == "i":
+        min_index = np.min(indices)
+        max_index = np.max(indices)
+        if min_index >= -1 and max_index < 2 * indices.size:
+            # Renumber the (dense enough) group indices using a lookup table, which is linear instead of sorting them.
+            is_used = np.zeros(max_index + 2, dtype="bool")
+            is_used[indices + 1] = True
+            new_of_old = np.cumsum(is_used) - (2 if min_index < 0 else 1)
+            return new_of_old[indices + 1].astype(indices.dtype)
+
     unique, consecutive = np.unique(indices, return_inverse=True)
     consecutive += min(unique[0], 0)
     return consecutive.astype(indices.dtype)
 
 
+@utm.timed_call()
+def group_indices(groups: utt.Vector, *, groups_count: Optional[int] = None) -> List[utt.NumpyVector]:
+    """
+    Given a vector of ``groups`` per element, return a list containing the (sorted) indices of the elements of each
+    group.
+
+    Negative group indices ("outliers") are ignored. If ``groups_count`` is not specified, it is taken to be the maximal
+    group index plus one.
+
+    This partitions all the elements in a single pass, instead of comparing the whole vector with each group index.
+    """
+    groups = utt.to_numpy_vector(groups)
+    order = np.argsort(groups, kind="stable")
+    sorted_groups = groups[order]
+    if groups_count is None:
+        groups_count = int(sorted_groups[-1]) + 1 if sorted_groups.size > 0 else 0
+    if groups_count <= 0:
+        return []
+
+    boundaries = np.searchsorted(sorted_groups, np.arange(groups_count + 1))
+    utm.timed_parameters(elements=groups.size, groups=groups_count)
+    return [order[boundaries[group_index] : boundaries[group_index + 1]] for group_index in range(groups_count)]
+
+
 @utm.timed_call()
 def bin_pack(element_sizes: utt.Vector, max_bin_size: float) -> utt.NumpyVector:
     """
@@ -2144,6 +2205,8 @@ def sum_groups(
     if per == "column":
         matrix = matrix.transpose()
 
+    entity_indices_of_groups = group_indices(groups, groups_count=groups_count)
+
     with utm.timed_step(timed_step):
         utm.timed_parameters(groups=groups_count, entities=matrix.shape[0], elements=matrix.shape[1])
 
@@ -2154,9 +2217,9 @@ def sum_groups(
                 group_index,
                 formatter=lambda group_index: utl.progress_description(groups_count, group_index, "group"),
             ):
-                group_mask = groups == group_index
-                utl.log_calc("group_mask", group_mask)
-                group_matrix = matrix[group_mask, :]
+                group_entity_indices = entity_indices_of_groups[group_index]
+                utl.log_calc("group_entities", len(group_entity_indices))
+                group_matrix = matrix[group_entity_indices, :]
                 if transform is not None:
                     group_matrix = transform(group_matrix)
                 group_size = group_matrix.shape[0]
@@ -2265,6 +2328,35 @@ def cover_coordinates(
     return spaced_x_coordinates, spaced_y_coordinates
 
 
+def random_piles_count(elements_count: int, target_pile_size: int) -> int:
+    """
+    Return the number of piles :py:func:`random_piles` will split ``elements_count`` elements into, given the
+    ``target_pile_size``.
+    """
+    assert elements_count > 0
+    assert target_pile_size > 0
+    fractional_piles_count = elements_count / target_pile_size
+
+    few_piles_count = max(floor(fractional_piles_count), 1)
+    many_piles_count = ceil(fractional_piles_count)
+
+    if few_piles_count == many_piles_count:
+        return few_piles_count
+
+    few_piles_size = elements_count / few_piles_count
+    many_piles_size = elements_count / many_piles_count
+
+    few_piles_factor = few_piles_size / target_pile_size
+    many_piles_factor = target_pile_size / many_piles_size
+
+    assert few_piles_factor >= 1
+    assert many_piles_factor >= 1
+
+    if few_piles_factor < many_piles_factor:
+        return few_piles_count
+    return many_piles_count
+
+
 @utm.timed_call()
 def random_piles(
     elements_count: int,
@@ -2275,34 +2367,11 @@ def random_piles(
     """
     Split ``elements_count`` elements into piles of a size roughly equal to ``target_pile_size``.
 
-    Return a vector specifying the pile index of each element.
+    Return an ``int32`` vector specifying the pile index of each element.
 
     Specify a non-zero ``random_seed`` to make this replicable.
     """
-    assert elements_count > 0
-    assert target_pile_size > 0
-    piles_count = elements_count / target_pile_size
-
-    few_piles_count = max(floor(piles_count), 1)
-    many_piles_count = ceil(piles_count)
-
-    if few_piles_count == many_piles_count:
-        piles_count = few_piles_count
-
-    else:
-        few_piles_size = elements_count / few_piles_count
-        many_piles_size = elements_count / many_piles_count
-
-        few_piles_factor = few_piles_size / target_pile_size
-        many_piles_factor = target_pile_size / many_piles_size
-
-        assert few_piles_factor >= 1
-        assert many_piles_factor >= 1
-
-        if few_piles_factor < many_piles_factor:
-            piles_count = few_piles_count
-        else:
-            piles_count = many_piles_count
+    piles_count = random_piles_count(elements_count, target_pile_size)
 
     pile_of_elements_list: List[utt.NumpyVector] = []
 
@@ -2311,9 +2380,9 @@ def random_piles(
     assert 0 <= extra_elements < piles_count
 
     if extra_elements > 0:
-        pile_of_elements_list.append(np.arange(extra_elements))
+        pile_of_elements_list.append(np.arange(extra_elements, dtype="int32"))
     for pile_index in range(piles_count):
-        pile_of_elements_list.append(np.full(minimal_pile_size, pile_index))
+        pile_of_elements_list.append(np.full(minimal_pile_size, pile_index, dtype="int32"))
 
     pile_of_elements = np.concatenate(pile_of_elements_list)
     assert pile_of_elements.size == elements_count
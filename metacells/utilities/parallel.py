@@ -59,9 +59,11 @@ from typing import Any
 from typing import Callable
 from typing import List
 from typing import Optional
+from typing import Sequence
 from typing import Tuple
 from typing import TypeVar
 
+import numpy as np
 import psutil  # type: ignore
 from threadpoolctl import threadpool_limits  # type: ignore
 
@@ -154,6 +156,7 @@ def parallel_map(
     *,
     max_processors: int = 0,
     hide_from_progress_bar: bool = False,
+    weights: Optional[Sequence[float]] = None,
 ) -> List[T]:
     """
     Execute ``function``, in parallel, ``invocations`` times. Each invocation is given the invocation's index as its
@@ -168,6 +171,11 @@ def parallel_map(
     If this ends up using a single process, runs the function serially. Otherwise, fork new processes to execute the
     function invocations (using ``multiprocessing.get_context('fork').Pool.map``).
 
+    If ``weights`` (default: {weights}) are specified, they should contain the (estimated relative) cost of each
+    invocation. The invocations are then dispatched to the processes in decreasing cost order, so that an expensive
+    invocation doesn't start last and leave the rest of the processes idle while it completes. The results are always
+    returned in the invocations order.
+
     The downside is that this is slow, and you need to set up **mutable** shared memory (e.g. for large results) in
     advance. The upside is that each of these processes starts with a shared memory copy(-on-write) of the full Python
     state, that is, all the inputs for the function are available "for free".
@@ -210,6 +218,12 @@ def parallel_map(
     os.environ["OMP_NUM_THREADS"] = num_threads
     os.environ["MKL_NUM_THREADS"] = num_threads
 
+    if weights is None:
+        indices: Sequence[int] = range(invocations)
+    else:
+        assert len(weights) == invocations
+        indices = [int(index) for index in np.argsort(-np.array(weights, dtype="float64"), kind="stable")]
+
     PARALLEL_FUNCTION = function
     IS_MAIN_PROCESS = None
     try:
@@ -218,7 +232,7 @@ def parallel_map(
         with utm.timed_step("parallel_map"):
             utm.timed_parameters(index=MAP_INDEX, processes=PROCESSES_COUNT)
             with get_context("fork").Pool(PROCESSES_COUNT) as pool:
-                for index, result in pool.imap_unordered(_invocation, range(invocations)):
+                for index, result in pool.imap_unordered(_invocation, indices):
                     if utp.has_progress_bar() and not hide_from_progress_bar:
                         utp.did_progress(1 / invocations)
                     results[index] = result
@@ -0,0 +1,152 @@
+"""
+Test the pipeline functions.
+"""
+
+from typing import Any
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import numpy as np
+import pytest
+from anndata import AnnData  # type: ignore
+
+import metacells.pipeline as pl
+import metacells.pipeline.divide_and_conquer as dac
+import metacells.tools as tl
+import metacells.utilities as ut
+
+ut.allow_inefficient_layout(False)
+
+# pylint: disable=missing-function-docstring
+
+
+def _random_cells(cells_count: int, genes_count: int) -> AnnData:
+    np.random.seed(123456)
+    adata = AnnData(np.random.poisson(4.0, (cells_count, genes_count)).astype("float32"))
+    adata.obs_names = [f"C{index}" for index in range(cells_count)]
+    adata.var_names = [f"G{index}" for index in range(genes_count)]
+    ut.set_name(adata, "cells")
+    return adata
+
+
+def test_collect_metacell_groups_of_subset() -> None:
+    adata = _random_cells(40, 5)
+    metacell_of_cells = np.arange(40, dtype="int32") % 4
+
+    for subset_mask in (np.full(40, True), metacell_of_cells < 3):
+        subset_indices = np.flatnonzero(subset_mask)
+        sdata = ut.slice(adata, name=".grouped", top_level=False, obs=subset_indices)
+        if np.all(subset_mask):
+            assert getattr(sdata, "__derived__") is getattr(adata, "__derived__")
+
+        sliced = dac._collect_metacell_groups(  # pylint: disable=protected-access
+            adata,
+            "__x__",
+            metacell_of_cells=metacell_of_cells,
+            prefix="cells",
+            subset_mask=subset_mask,
+            random_seed=123456,
+        )
+
+        bdata = ut.copy_adata(adata, name=".grouped", top_level=False)
+        unsliced = pl.collect_metacells(
+            bdata,
+            groups=np.where(subset_mask, metacell_of_cells, -1),
+            _metacell_groups=True,
+            top_level=False,
+            random_seed=123456,
+        )
+
+        assert list(sliced.obs_names) == list(unsliced.obs_names)
+        assert np.allclose(ut.to_numpy_matrix(sliced.X), ut.to_numpy_matrix(unsliced.X))
+        for name in ("grouped", "total_umis"):
+            assert np.allclose(ut.get_o_numpy(sliced, name), ut.get_o_numpy(unsliced, name))
+
+        # The sliced data contains only the grouped cells, so the metacell groups have no outliers.
+        assert ut.get_m_data(sliced, "outliers") == 0
+        assert ut.get_m_data(unsliced, "outliers") == 40 - len(subset_indices)
+
+
+def test_find_rare_gene_modules_of_few_cells(monkeypatch: pytest.MonkeyPatch) -> None:
+    adata = _random_cells(40, 5)
+    detected: List[Optional[str]] = []
+    logged: List[Tuple[str, Any]] = []
+
+    def _detect(adata: AnnData, what: str, **kwargs: Any) -> None:
+        assert what == "__x__"
+        detected.append(ut.get_name(adata))
+
+    def _log_calc(name: str, value: Any = None, **kwargs: Any) -> bool:
+        logged.append((name, value))
+        return True
+
+    monkeypatch.setattr(tl, "find_rare_gene_modules", _detect)
+    monkeypatch.setattr(ut, "log_calc", _log_calc)
+
+    dac._find_rare_gene_modules(  # pylint: disable=protected-access
+        adata, "__x__", min_piles_to_detect=2.0, cache=False, target_pile_size=30
+    )
+    assert detected == []
+    assert ("skip rare gene modules", True) in logged
+    assert np.all(ut.get_o_numpy(adata, "cells_rare_gene_module") == -1)
+    assert not np.any(ut.get_v_numpy(adata, "rare_gene"))
+
+    logged.clear()
+    dac._find_rare_gene_modules(  # pylint: disable=protected-access
+        adata, "__x__", min_piles_to_detect=1.0, cache=False, target_pile_size=30
+    )
+    assert detected == ["cells"]
+    assert ("skip rare gene modules", True) not in logged
+
+
+def test_find_rare_gene_modules_cache(monkeypatch: pytest.MonkeyPatch) -> None:
+    detected: List[int] = []
+
+    def _detect(adata: AnnData, what: str, **kwargs: Any) -> None:
+        assert what == "__x__"
+        detected.append(kwargs["max_genes"])
+        dac._set_rare_gene_modules(  # pylint: disable=protected-access
+            adata,
+            rare_module_of_cells=np.arange(adata.n_obs, dtype="int32") % len(detected),
+            rare_module_of_genes=np.full(adata.n_vars, len(detected), dtype="int32"),
+        )
+
+    def _find(adata: AnnData, *, cache: bool = True, max_genes: int = 10) -> List[List[int]]:
+        dac._find_rare_gene_modules(  # pylint: disable=protected-access
+            adata, "__x__", min_piles_to_detect=0.0, cache=cache, max_genes=max_genes, target_pile_size=30
+        )
+        return [
+            list(ut.get_o_numpy(adata, "cells_rare_gene_module")),
+            list(ut.get_v_numpy(adata, "rare_gene_module")),
+        ]
+
+    monkeypatch.setattr(tl, "find_rare_gene_modules", _detect)
+    dac.clear_rare_gene_modules_cache()
+    try:
+        adata = _random_cells(40, 5)
+        modules = _find(adata)
+        assert len(detected) == 1
+
+        assert _find(ut.copy_adata(adata, share_derived=False)) == modules
+        assert len(detected) == 1
+
+        assert _find(adata, max_genes=20) != modules
+        assert len(detected) == 2
+
+        bdata = ut.copy_adata(adata, share_derived=False)
+        bdata.X[0, 0] += 1
+        modules = _find(bdata)
+        assert len(detected) == 3
+
+        assert _find(bdata, cache=False) != modules
+        assert len(detected) == 4
+        assert _find(bdata) == modules
+        assert len(detected) == 4
+
+        dac.clear_rare_gene_modules_cache()
+        _find(bdata)
+        assert len(detected) == 5
+
+    finally:
+        dac.clear_rare_gene_modules_cache()
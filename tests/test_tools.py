@@ -0,0 +1,420 @@
+"""
+Test the tool functions.
+"""
+
+from typing import Any
+from typing import List
+from typing import Tuple
+
+import numpy as np
+import pytest
+import scipy.sparse as sp  # type: ignore
+from anndata import AnnData  # type: ignore
+
+import metacells.tools as tl
+import metacells.tools.candidates as tlc
+import metacells.utilities as ut
+
+ut.allow_inefficient_layout(False)
+
+# pylint: disable=missing-function-docstring,protected-access
+
+
+def _cells_data(cells_count: int, name: str) -> AnnData:
+    adata = AnnData(np.zeros((cells_count, 3), dtype="float32"))
+    adata.obs_names = [f"{name}{index}" for index in range(cells_count)]
+    adata.var_names = ["g0", "g1", "g2"]
+    ut.set_name(adata, name)
+    return adata
+
+
+def test_apply_obs_annotations_defaults() -> None:
+    adata = _cells_data(6, "full")
+    sdata = _cells_data(2, "slice")
+    ut.set_o_data(sdata, "value", np.array([7, 8], dtype="int32"))
+
+    tl.apply_obs_annotations(
+        adata,
+        sdata,
+        {
+            "value": tl.DefaultValues(slice=tl.Raise, full=0),
+            "skipped": tl.DefaultValues(slice=tl.Skip, full=0),
+            "missing": tl.DefaultValues(slice=1.5, full=None),
+        },
+        indices=np.array([1, 4]),
+    )
+
+    assert list(ut.get_o_numpy(adata, "value")) == [0, 7, 0, 0, 8, 0]
+    assert not ut.has_data(adata, "skipped")
+    missing = ut.get_o_numpy(adata, "missing")
+    assert str(missing.dtype) == "float32"
+    assert list(np.isnan(missing)) == [True, False, True, True, False, True]
+    assert list(missing[[1, 4]]) == [1.5, 1.5]
+
+    with pytest.raises(KeyError, match="unknown slice data: slice name: unknown"):
+        tl.apply_obs_annotations(
+            adata, sdata, {"unknown": tl.DefaultValues(slice=tl.Raise, full=0)}, indices=np.array([1, 4])
+        )
+
+    with pytest.raises(KeyError, match="unknown full data: full name: absent"):
+        ut.set_o_data(sdata, "absent", np.array([1, 2]))
+        tl.apply_obs_annotations(
+            adata, sdata, {"absent": tl.DefaultValues(slice=0, full=tl.Raise)}, indices=np.array([1, 4])
+        )
+
+    tl.apply_obs_annotations(
+        adata, sdata, {"absent": tl.DefaultValues(slice=0, full=tl.Skip)}, indices=np.array([1, 4])
+    )
+    assert not ut.has_data(adata, "absent")
+
+
+def test_apply_obs_annotations_indices() -> None:
+    for indices in ([2, 3, 4], [0, 2, 5], [5, 1, 3]):
+        adata = _cells_data(6, "full")
+        sdata = _cells_data(3, "slice")
+        ut.set_o_data(sdata, "value", np.array([10, 20, 30], dtype="int32"))
+        ut.set_o_data(sdata, "full_index", np.array(indices, dtype="int32"))
+
+        tl.apply_obs_annotations(adata, sdata, {"value": tl.DefaultValues(slice=0, full=-1)}, indices="full_index")
+
+        expected = np.full(6, -1)
+        expected[indices] = [10, 20, 30]
+        assert list(ut.get_o_numpy(adata, "value")) == list(expected)
+
+
+def test_apply_obs_annotations_to_self() -> None:
+    adata = _cells_data(4, "full")
+    ut.set_o_data(adata, "value", np.array([1, 2, 3, 4], dtype="int32"))
+    value = ut.get_o_numpy(adata, "value")
+
+    tl.apply_obs_annotations(
+        adata,
+        adata,
+        {"value": tl.DefaultValues(slice=0, full=0), "missing": tl.DefaultValues(slice=True, full=False)},
+        indices=np.arange(4),
+    )
+
+    assert ut.get_o_numpy(adata, "value") is value
+    assert list(ut.get_o_numpy(adata, "missing")) == [True, True, True, True]
+
+
+def test_apply_obs_annotations_shared_default() -> None:
+    adata = _cells_data(4, "full")
+    sdata = _cells_data(2, "slice")
+    ut.set_o_data(sdata, "first", np.array([True, True]))
+    ut.set_o_data(sdata, "second", np.array([True, False]))
+
+    tl.apply_obs_annotations(
+        adata,
+        sdata,
+        {"first": tl.DefaultValues(slice=False, full=False), "second": tl.DefaultValues(slice=False, full=False)},
+        indices=np.array([0, 3]),
+    )
+
+    first = ut.get_o_numpy(adata, "first")
+    second = ut.get_o_numpy(adata, "second")
+    assert not np.shares_memory(first, second)
+    assert list(first) == [True, False, False, True]
+    assert list(second) == [True, False, False, False]
+
+
+def test_apply_obs_annotations_array_default() -> None:
+    adata = _cells_data(6, "full")
+    sdata = _cells_data(2, "slice")
+
+    tl.apply_obs_annotations(
+        adata,
+        sdata,
+        {"value": tl.DefaultValues(slice=3, full=np.arange(6, dtype="int32"))},
+        indices=np.array([1, 4]),
+    )
+
+    assert list(ut.get_o_numpy(adata, "value")) == [0, 3, 2, 3, 3, 5]
+
+
+def test_apply_obs_annotations_dtypes() -> None:
+    adata = _cells_data(4, "full")
+    sdata = _cells_data(2, "slice")
+    ut.set_o_data(sdata, "bool", np.array([True, False]))
+    ut.set_o_data(sdata, "int", np.array([7, 8], dtype="int32"))
+    ut.set_o_data(sdata, "float32", np.array([0.25, 0.75], dtype="float32"))
+    ut.set_o_data(sdata, "float64", np.array([0.25, 0.75], dtype="float64"))
+    ut.set_o_data(sdata, "name", np.array(["a", "b"], dtype="object"))
+
+    tl.apply_obs_annotations(
+        adata,
+        sdata,
+        {
+            "bool": tl.DefaultValues(slice=False, full=False),
+            "int": tl.DefaultValues(slice=0, full=-1),
+            "small": tl.DefaultValues(slice=7, full=0),
+            "float32": tl.DefaultValues(slice=0.0, full=0.5),
+            "float64": tl.DefaultValues(slice=0.0, full=0.5),
+            "name": tl.DefaultValues(slice="", full="unknown"),
+            "none": tl.DefaultValues(slice=1, full=None),
+        },
+        indices=np.array([0, 2]),
+    )
+
+    expected = {
+        "bool": ("bool", [True, False, False, False]),
+        "int": ("int32", [7, -1, 8, -1]),
+        "small": ("int64", [7, 0, 7, 0]),
+        "float32": ("float32", [0.25, 0.5, 0.75, 0.5]),
+        "float64": ("float64", [0.25, 0.5, 0.75, 0.5]),
+        "name": ("object", ["a", "unknown", "b", "unknown"]),
+    }
+    for name, (dtype, values) in expected.items():
+        value = ut.get_o_numpy(adata, name)
+        assert str(value.dtype) == dtype, name
+        assert list(value) == values, name
+
+    none = ut.get_o_numpy(adata, "none")
+    assert str(none.dtype) == "float32"
+    assert list(np.isnan(none)) == [False, True, False, True]
+
+
+def test_apply_obs_annotations_twice() -> None:
+    adata = _cells_data(4, "full")
+    sdata = _cells_data(2, "slice")
+
+    tl.apply_obs_annotations(adata, sdata, {"value": tl.DefaultValues(slice=1, full=0)}, indices=np.array([0, 1]))
+    assert str(ut.get_o_numpy(adata, "value").dtype) == "int64"
+
+    ut.set_o_data(sdata, "value", np.array([1000, -1000], dtype="int32"))
+    tl.apply_obs_annotations(adata, sdata, {"value": tl.DefaultValues(slice=0, full=0)}, indices=np.array([2, 3]))
+    assert str(ut.get_o_numpy(adata, "value").dtype) == "int64"
+    assert list(ut.get_o_numpy(adata, "value")) == [1, 1, 1000, -1000]
+
+    ut.set_o_data(sdata, "value", np.array([0.5, 1.5], dtype="float32"))
+    tl.apply_obs_annotations(adata, sdata, {"value": tl.DefaultValues(slice=0, full=0)}, indices=np.array([1, 2]))
+    assert str(ut.get_o_numpy(adata, "value").dtype) == "float64"
+    assert list(ut.get_o_numpy(adata, "value")) == [1, 0.5, 1.5, -1000]
+
+
+def test_apply_obs_annotations_widening() -> None:
+    adata = _cells_data(4, "full")
+    sdata = _cells_data(2, "slice")
+    ut.set_o_data(adata, "int8", np.array([1, 2, 3, 4], dtype="int8"))
+    ut.set_o_data(adata, "int32", np.array([1, 2, 3, 4], dtype="int32"))
+    ut.set_o_data(adata, "bool", np.array([True, False, True, False]))
+    ut.set_o_data(sdata, "int8", np.array([1000, -1000], dtype="int32"))
+    ut.set_o_data(sdata, "bool", np.array([0.5, 1.5], dtype="float32"))
+
+    tl.apply_obs_annotations(
+        adata,
+        sdata,
+        {
+            "int8": tl.DefaultValues(slice=0, full=0),
+            "int32": tl.DefaultValues(slice=7, full=0),
+            "bool": tl.DefaultValues(slice=0.0, full=False),
+        },
+        indices=np.array([1, 2]),
+    )
+
+    expected = {
+        "int8": ("int32", [1, 1000, -1000, 4]),
+        "int32": ("int32", [1, 7, 7, 4]),
+        "bool": ("float32", [1.0, 0.5, 1.5, 0.0]),
+    }
+    for name, (dtype, values) in expected.items():
+        value = ut.get_o_numpy(adata, name)
+        assert str(value.dtype) == dtype, name
+        assert list(value) == values, name
+
+
+def _loop_majority(
+    group_of_cells: np.ndarray, values_of_cells: np.ndarray, min_value_fraction: float, conflict: Any
+) -> List[Any]:
+    value_of_groups = []
+    for group_index in range(int(np.max(group_of_cells)) + 1):
+        cells_mask = group_of_cells == group_index
+        unique_values_of_group, unique_counts_of_group = np.unique(values_of_cells[cells_mask], return_counts=True)
+        majority_index = np.argmax(unique_counts_of_group)
+        if unique_counts_of_group[majority_index] / np.sum(cells_mask) < min_value_fraction:
+            value_of_groups.append(conflict)
+        else:
+            value_of_groups.append(unique_values_of_group[majority_index])
+    return value_of_groups
+
+
+def _group_majority(
+    group_of_cells: np.ndarray, values_of_cells: np.ndarray, min_value_fraction: float, conflict: Any
+) -> List[Any]:
+    adata = _cells_data(len(group_of_cells), "cells")
+    ut.set_o_data(adata, "group", group_of_cells)
+    ut.set_o_data(adata, "value", values_of_cells)
+    gdata = _cells_data(int(np.max(group_of_cells)) + 1, "groups")
+    value_of_groups = tl.group_obs_annotation(
+        adata,
+        gdata,
+        groups="group",
+        name="value",
+        min_value_fraction=min_value_fraction,
+        conflict=conflict,
+        inplace=False,
+    )
+    assert value_of_groups is not None
+    return list(ut.to_numpy_vector(value_of_groups))
+
+
+def test_group_obs_annotation_majority() -> None:
+    group_of_cells = np.array([0, 0, 1, 1, 1, 2, 2, 2, 2, -1, 3, 3], dtype="int32")
+    for values_of_cells, conflict in (
+        (np.array([3, 1, 2, 2, 5, 1, 4, 4, 1, 1, 7, 7], dtype="int32"), -1),
+        (np.array([np.nan, 1, np.nan, np.nan, 0.5, 1, np.nan, 0.5, 1, 2, 3, 3], dtype="float32"), -1.0),
+        (np.array(["b", "a", "c", "c", "a", "x", "y", "x", "y", "z", "b", "b"], dtype="object"), "conflict"),
+    ):
+        for min_value_fraction in (0.0, 0.5, 0.75):
+            expected = _loop_majority(group_of_cells, values_of_cells, min_value_fraction, conflict)
+            actual = _group_majority(group_of_cells, values_of_cells, min_value_fraction, conflict)
+            assert [str(value) for value in actual] == [str(value) for value in expected]
+
+    # Neither the old loop nor the vectorized code can order ``None`` against other values.
+    values_of_cells = np.array(["a", None, "a", "b", "b", None, None, "a", "a", "a", "b", "b"], dtype="object")
+    with pytest.raises(TypeError):
+        _loop_majority(group_of_cells, values_of_cells, 0.5, "conflict")
+    with pytest.raises(TypeError):
+        _group_majority(group_of_cells, values_of_cells, 0.5, "conflict")
+
+
+def _communities() -> Tuple[np.ndarray, np.ndarray]:
+    # Community 1 is empty, and nodes 2 and 7 are outliers.
+    community_of_nodes = np.array([0, 2, -1, 2, 0, 3, 2, -1, 4, 4], dtype="int32")
+    node_sizes = np.array([0.5, 1.25, 9.0, 2.0, 0.75, 3.5, 0.25, 9.0, 1.0, 1.0], dtype="float32")
+    return community_of_nodes, node_sizes
+
+
+def test_communities_nodes_count_and_size() -> None:
+    community_of_nodes, node_sizes = _communities()
+
+    nodes_count_of_communities, size_of_communities = tlc._communities_nodes_count_and_size(
+        community_of_nodes, node_sizes, 5
+    )
+
+    assert size_of_communities.dtype == node_sizes.dtype
+    for community_index in range(5):
+        community_mask = community_of_nodes == community_index
+        assert nodes_count_of_communities[community_index] == np.sum(community_mask)
+        assert size_of_communities[community_index] == np.sum(node_sizes[community_mask])
+
+
+def test_find_small_communities() -> None:
+    community_of_nodes, node_sizes = _communities()
+
+    for min_metacell_size, min_metacell_cells in ((None, None), (2.0, None), (None, 2), (1.25, 2), (3.5, 3)):
+        expected_communities = set()
+        expected_nodes_count = 0
+        for community_index in range(5):
+            community_mask = community_of_nodes == community_index
+            community_nodes_count = np.sum(community_mask)
+            community_size = np.sum(node_sizes[community_mask])
+            if (min_metacell_cells is not None and community_nodes_count < min_metacell_cells) or (
+                min_metacell_size is not None and community_size < min_metacell_size
+            ):
+                expected_communities.add(community_index)
+                expected_nodes_count += community_nodes_count
+
+        small_communities, small_nodes_count = tlc._find_small_communities(
+            community_of_nodes=community_of_nodes,
+            node_sizes=node_sizes,
+            min_metacell_size=min_metacell_size,
+            min_metacell_cells=min_metacell_cells,
+        )
+
+        if min_metacell_size is None and min_metacell_cells is None:
+            assert small_communities == set()
+        else:
+            assert small_communities == expected_communities
+            assert small_nodes_count == expected_nodes_count
+
+
+def test_cut_split_communities() -> None:
+    for max_metacell_size, min_metacell_cells in ((None, None), (1.5, None), (1.5, 2), (3.25, None), (3.5, 1)):
+        community_of_nodes, node_sizes = _communities()
+        old_community_of_nodes = community_of_nodes.copy()
+
+        expected_split_communities = set()
+        for community_index in range(5):
+            community_mask = old_community_of_nodes == community_index
+            if (
+                max_metacell_size is not None
+                and np.sum(node_sizes[community_mask]) > max_metacell_size
+                and (min_metacell_cells is None or np.sum(community_mask) >= 2 * min_metacell_cells)
+            ):
+                expected_split_communities.add(community_index)
+
+        empty_edge_weights = sp.csr_matrix((10, 10), dtype="float32")
+        split_communities_count, cut_communities_count = tlc._cut_split_communities(
+            outgoing_edge_weights=empty_edge_weights,
+            incoming_edge_weights=empty_edge_weights,
+            community_of_nodes=community_of_nodes,
+            node_sizes=node_sizes,
+            min_metacell_cells=min_metacell_cells,
+            max_metacell_size=max_metacell_size,
+            max_split_min_cut_strength=None,
+            min_cut_seed_cells=1,
+            must_complete_cover=False,
+            atomic_candidates=set(),
+        )
+
+        assert split_communities_count == len(expected_split_communities)
+        assert cut_communities_count == 0
+        for community_index in range(5):
+            community_mask = old_community_of_nodes == community_index
+            if community_index in expected_split_communities:
+                assert np.all(
+                    (community_of_nodes[community_mask] == community_index) | (community_of_nodes[community_mask] >= 5)
+                )
+            else:
+                assert np.all(community_of_nodes[community_mask] == community_index)
+        assert np.all(community_of_nodes[old_community_of_nodes < 0] < 0)
+
+
+def test_cancel_communities() -> None:
+    for cancelled_communities in (set(), {0}, {1, 3}, {0, 2, 3, 4}):
+        community_of_nodes, _ = _communities()
+
+        expected_community_of_nodes = community_of_nodes.copy()
+        kept_communities_count = 0
+        for community_index in range(5):
+            if community_index in cancelled_communities:
+                expected_community_of_nodes[expected_community_of_nodes == community_index] = -1
+                continue
+            if community_index > kept_communities_count:
+                expected_community_of_nodes[expected_community_of_nodes == community_index] = kept_communities_count
+            kept_communities_count += 1
+
+        assert tlc._cancel_communities(community_of_nodes, cancelled_communities) == kept_communities_count
+        assert str(community_of_nodes.dtype) == "int32"
+        assert list(community_of_nodes) == list(expected_community_of_nodes)
+
+
+def test_compute_candidate_metacells_of_unsorted_graph() -> None:
+    np.random.seed(123456)
+    nodes_count = 60
+    neighbors_count = 6
+    indptr = np.arange(nodes_count + 1, dtype="int32") * neighbors_count
+    indices = np.concatenate(
+        [
+            np.random.permutation(np.delete(np.arange(nodes_count), node_index))[:neighbors_count]
+            for node_index in range(nodes_count)
+        ]
+    ).astype("int32")
+    data = np.random.rand(nodes_count * neighbors_count).astype("float32")
+    edge_weights = sp.csr_matrix((data, indices, indptr), shape=(nodes_count, nodes_count))
+    edge_weights.has_sorted_indices = False
+    assert not np.all(np.diff(indices[:neighbors_count]) > 0)
+
+    adata = _cells_data(nodes_count, "nodes")
+    adata.obsp["obs_outgoing_weights"] = edge_weights
+    frozen_indices = ut.mustbe_compressed_matrix(ut.get_oo_proper(adata, "obs_outgoing_weights")).indices.copy()
+
+    tl.compute_candidate_metacells(adata, target_metacell_size=10, random_seed=1)
+
+    candidate_of_nodes = ut.get_o_numpy(adata, "candidate")
+    assert np.min(candidate_of_nodes) >= -1
+    assert np.max(candidate_of_nodes) >= 0
+    assert list(ut.mustbe_compressed_matrix(ut.get_oo_proper(adata, "obs_outgoing_weights")).indices) == list(
+        frozen_indices
+    )
@@ -389,6 +389,32 @@ def test_compress_indices() -> None:
     assert list(ut.compress_indices(np.array([0, 3, 2]))) == [0, 2, 1]
     assert list(ut.compress_indices(np.array([0, -1, 2]))) == [0, -1, 1]
 
+    np.random.seed(123456)
+    for indices in (
+        np.array([], dtype="int32"),
+        np.array([-1, -1], dtype="int32"),
+        np.array([5, 5, 3], dtype="int32"),
+        np.random.randint(-1, 20, size=100).astype("int32"),
+        np.random.randint(0, 150, size=100).astype("int64"),
+        np.random.choice([-1, 3, 7, 1000, 123456], size=100).astype("int32"),
+        np.random.choice([3, 7, 1000], size=100).astype("uint32"),
+    ):
+        compressed = ut.compress_indices(indices)
+        assert compressed.dtype == indices.dtype
+        if indices.size == 0:
+            assert compressed.size == 0
+        else:
+            unique, expected = np.unique(indices, return_inverse=True)
+            expected += min(unique[0], 0)
+            assert list(compressed) == list(expected)
+
+
+def test_group_indices() -> None:
+    indices_of_groups = ut.group_indices(np.array([1, -1, 0, 1, 2, -1, 0]))
+    assert [list(indices) for indices in indices_of_groups] == [[2, 6], [0, 3], [4]]
+    indices_of_groups = ut.group_indices(np.array([0, -1, 0]), groups_count=2)
+    assert [list(indices) for indices in indices_of_groups] == [[0, 2], []]
+
 
 def test_parallel_map() -> None:
     @ut.timed_call("invocation")
@@ -399,6 +425,9 @@ def test_parallel_map() -> None:
     expected = list(range(100))
     assert actual == expected
 
+    actual = list(ut.parallel_map(invocation, 100, weights=[index % 7 for index in range(100)]))
+    assert actual == expected
+
     # TODO: Why does pytest coverage error trying to read these files?
     for path in glob(".coverage.*"):
         os.remove(path)
@@ -472,6 +501,7 @@ def test_random_piles() -> None:
     result = ut.random_piles(10, target_pile_size=3, random_seed=123456)
     expected = np.array([2, 2, 1, 1, 1, 0, 0, 2, 0, 0])
     assert np.allclose(result, expected)
+    assert ut.random_piles_count(10, target_pile_size=3) == np.max(result) + 1
 
 
 def test_dense_per() -> None: